@@ -3,24 +3,38 @@ Flask backend for Market Basket Analysis.
 Supports market basket analysis using the mlxtend library.
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 import json
 import io
 import os
+import codecs
+import csv
+import hashlib
+import math
+import re
+import time
+import zipfile
 from datetime import datetime
-from urllib.parse import unquote
+from urllib.parse import quote, unquote
 import tempfile
+import threading
+from collections import OrderedDict
 from werkzeug.utils import secure_filename, safe_join
 import logging
 import traceback
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 
 # Import data processor
+from data_processors import tracing
 from data_processors.basket_analyzer import BasketAnalyzer
+from data_processors.rule_index import DEFAULT_SORT
+from jobs import JobManager, JobQueueFull, report_counter, report_progress
 
 # Create Flask app
 app = Flask(__name__)
@@ -35,51 +49,133 @@ app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB
 UPLOAD_FOLDER_NAME = 'uploads'
 UPLOAD_FOLDER = os.path.join(app.root_path, UPLOAD_FOLDER_NAME)
 ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
+# CSV files at least this large are mined with chunked streaming ingestion (0 disables streaming)
+CSV_STREAM_MIN_BYTES = int(os.environ.get('CSV_STREAM_MIN_BYTES', str(100 * 1024 * 1024)))
+CSV_STREAM_CHUNK_ROWS = int(os.environ.get('CSV_STREAM_CHUNK_ROWS', '200000'))
+# 'fast' writes the styled rules workbook via write_fast_excel; 'styled' is the original per-cell openpyxl pass
+EXCEL_EXPORT_MODE = os.environ.get('EXCEL_EXPORT_MODE', 'fast')
+CSV_ENCODINGS = ['utf-8', 'utf-8-sig', 'cp1252', 'iso-8859-1', 'tis-620', 'windows-1252']
 
 # Ensure the uploads directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Background job pool for /api/process (JOB_BACKEND=process|thread, JOB_WORKERS=N)
+JOB_MANAGER = JobManager(
+    max_workers=int(os.environ.get('JOB_WORKERS', '0')) or None,
+    backend=os.environ.get('JOB_BACKEND', 'process')
+)
+# Processes each Apriori job uses for support counting (1 = count in the job process itself)
+MINING_WORKERS = int(os.environ.get('MINING_WORKERS', '1'))
+# Per-stage spans in results['analysis']['spans'] and the /api/metrics histograms (STAGE_TRACING=0 turns them off)
+STAGE_TRACING = os.environ.get('STAGE_TRACING', '1') != '0'
+tracing.set_enabled(STAGE_TRACING)
+METRICS_PREFIX = 'flexbasket_'
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def read_file_safely(filepath):
-    """Read a file safely using multiple encodings."""
+ENCODING_SAMPLE_BYTES = 64 * 1024
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+def _decodes(sample, encoding):
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+def _looks_like_thai_8bit(sample):
+    """
+    TIS-620/cp874 Thai puts whole words in 0xA1-0xFB, so its high bytes come in runs;
+    Latin-1/cp1252 text has isolated accented bytes between ASCII letters.
+    """
+    high = [i for i, byte in enumerate(sample) if byte >= 0x80]
+    if len(high) < 16:
+        return False
+    in_thai_range = sum(1 for i in high if 0xA1 <= sample[i] <= 0xFB)
+    in_runs = sum(1 for i in high if (i > 0 and sample[i - 1] >= 0x80) or (i + 1 < len(sample) and sample[i + 1] >= 0x80))
+    return in_thai_range >= 0.95 * len(high) and in_runs >= 0.8 * len(high)
+
+def detect_csv_encoding(filepath, sample_bytes=ENCODING_SAMPLE_BYTES):
+    """
+    Pick a CSV encoding from the first and last `sample_bytes` of the file (never the whole file):
+    BOM, then strict UTF-8, then Thai 8-bit (cp874), then chardet on the sample, then CSV_ENCODINGS order.
+    """
+    size = os.path.getsize(filepath)
+    with open(filepath, 'rb') as f:
+        head = f.read(sample_bytes)
+        tail = b''
+        if size > 2 * sample_bytes:
+            f.seek(size - sample_bytes)
+            tail = f.read()
+            # the tail may start in the middle of a multi-byte UTF-8 character
+            tail = tail.lstrip(bytes(range(0x80, 0xC0)))
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    if _decodes(head, 'utf-8') and _decodes(tail, 'utf-8'):
+        return 'utf-8'
+    sample = head + b'\n' + tail
+    if _looks_like_thai_8bit(sample):
+        return 'cp874'
+    try:
+        import chardet
+        detected = chardet.detect(sample).get('encoding')
+        if detected and _decodes(sample, detected):
+            return detected
+    except ImportError:
+        pass
+    for encoding in CSV_ENCODINGS:
+        if _decodes(sample, encoding):
+            return encoding
+    return 'utf-8'
+
+def read_file_with_info(filepath):
+    """
+    Read an uploaded file; returns (df, info) where info holds the CSV encoding
+    and the detection / parse timings in milliseconds.
+    """
+    info = {'encoding': None, 'detectEncodingMs': 0.0, 'parseMs': 0.0}
     try:
         if filepath.lower().endswith('.csv'):
-            # Try multiple encodings for CSV files
-            encodings = ['utf-8', 'utf-8-sig', 'cp1252', 'iso-8859-1', 'tis-620', 'windows-1252']
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(filepath, encoding=encoding)
-                    print(f"[OK] CSV read successfully with encoding: {encoding}")
-                    return df
-                except UnicodeDecodeError:
-                    continue
-            
-            # Fallback to chardet if the encodings fail
+            # Detect the encoding from a small sample, then parse the file exactly once
+            start = time.perf_counter()
+            encoding = detect_csv_encoding(filepath)
+            info['detectEncodingMs'] = round((time.perf_counter() - start) * 1000, 2)
+            info['encoding'] = encoding
+            start = time.perf_counter()
             try:
-                import chardet
-                with open(filepath, 'rb') as f:
-                    raw_data = f.read()
-                    detected = chardet.detect(raw_data)
-                    if detected['encoding']:
-                        df = pd.read_csv(filepath, encoding=detected['encoding'])
-                        print(f"[OK] CSV read successfully with detected encoding: {detected['encoding']}")
-                        return df
-            except:
-                pass
+                df = pd.read_csv(filepath, encoding=encoding)
+            except UnicodeDecodeError:
+                # bytes outside the sampled head/tail did not fit; keep the data rather than fail
+                print(f"[WARN] {encoding} failed past the sampled bytes, replacing undecodable characters")
+                df = pd.read_csv(filepath, encoding=encoding, encoding_errors='replace')
+                info['encodingErrors'] = 'replace'
+            info['parseMs'] = round((time.perf_counter() - start) * 1000, 2)
+            print(f"[OK] CSV read successfully with encoding: {encoding} "
+                  f"(detect {info['detectEncodingMs']} ms, parse {info['parseMs']} ms)")
+            return df, info
                 
         else:
             # Excel readers fallback chain
+            start = time.perf_counter()
             try:
                 df = pd.read_excel(filepath, engine='openpyxl')
                 print("[OK] Excel read successfully with openpyxl")
-                return df
+                info['parseMs'] = round((time.perf_counter() - start) * 1000, 2)
+                return df, info
             except:
                 try:
                     df = pd.read_excel(filepath, engine='xlrd')
                     print("[OK] Excel read successfully with xlrd")
-                    return df
+                    info['parseMs'] = round((time.perf_counter() - start) * 1000, 2)
+                    return df, info
                 except:
                     pass
         
@@ -88,6 +184,192 @@ def read_file_safely(filepath):
     except Exception as e:
         raise Exception(f"Error reading file: {str(e)}")
 
+def read_file_safely(filepath):
+    """Read a file safely (CSV encoding is detected once from a sample)."""
+    df, _ = read_file_with_info(filepath)
+    return df
+
+def should_stream(filepath):
+    return (
+        CSV_STREAM_MIN_BYTES > 0
+        and filepath.lower().endswith('.csv')
+        and os.path.getsize(filepath) >= CSV_STREAM_MIN_BYTES
+    )
+
+PREVIEW_ROWS = 1000
+
+def _preview_records(df):
+    """Stringify a small frame for the preview table ('' for missing values) without iterrows."""
+    out = pd.DataFrame(index=df.index)
+    for i, col in enumerate(df.columns):
+        s = df.iloc[:, i]
+        # astype(str) formats datetimes differently from str(Timestamp); keep the old per-value form there
+        text = s.map(str) if pd.api.types.is_datetime64_any_dtype(s) else s.astype(str)
+        out[i] = text.where(s.notna(), '')
+    return out.values.tolist()
+
+def _count_csv_records(filepath, encoding):
+    """Data rows in a CSV read record by record with the csv module (blank lines skipped, like pd.read_csv)."""
+    with open(filepath, 'r', encoding=encoding or 'utf-8', errors='replace', newline='') as f:
+        records = sum(1 for row in csv.reader(f) if row)
+    return max(records - 1, 0)
+
+def _count_csv_rows(filepath, encoding):
+    """
+    Data rows in a CSV, counted like pd.read_csv. Line breaks are counted on the raw bytes; files where a
+    line is not a record (a quote character, which may open a multi-line cell, blank lines or bare \r
+    line breaks) are recounted with _count_csv_records.
+    """
+    if encoding and encoding.lower().startswith(('utf-16', 'utf-32')):
+        return _count_csv_records(filepath, encoding)
+    lines = 0
+    last = b'\n'  # a blank first line is a blank line too
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            edge = last[-2:] + block[:2]
+            if (b'"' in block or b'\n\n' in block or b'\n\r\n' in block or b'\n\n' in edge or b'\n\r\n' in edge
+                    or (b'\r' in block and block.count(b'\r') != block.count(b'\r\n') + block.endswith(b'\r'))
+                    or (last.endswith(b'\r') and not block.startswith(b'\n'))):
+                return _count_csv_records(filepath, encoding)
+            lines += block.count(b'\n')
+            last = block
+    if last and not last.endswith(b'\n'):
+        lines += 1
+    return max(lines - 1, 0)
+
+def read_preview(filepath, nrows=PREVIEW_ROWS):
+    """
+    Headers, the first `nrows` rows (as strings) and the total row count of an uploaded file,
+    without parsing the whole file. Returns (headers, rows, total_rows, info).
+    """
+    info = {'encoding': None, 'detectEncodingMs': 0.0, 'parseMs': 0.0, 'countRowsMs': 0.0}
+    lower = filepath.lower()
+    if lower.endswith('.csv'):
+        start = time.perf_counter()
+        encoding = detect_csv_encoding(filepath)
+        info['detectEncodingMs'] = round((time.perf_counter() - start) * 1000, 2)
+        info['encoding'] = encoding
+        start = time.perf_counter()
+        df = pd.read_csv(filepath, encoding=encoding, encoding_errors='replace', nrows=nrows)
+        info['parseMs'] = round((time.perf_counter() - start) * 1000, 2)
+        start = time.perf_counter()
+        total_rows = _count_csv_rows(filepath, encoding)
+        info['countRowsMs'] = round((time.perf_counter() - start) * 1000, 2)
+        return [str(c) for c in df.columns], _preview_records(df), total_rows, info
+
+    if lower.endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+            start = time.perf_counter()
+            workbook = load_workbook(filepath, read_only=True, data_only=True)
+            try:
+                # first sheet, like pd.read_excel
+                row_iter = workbook.worksheets[0].iter_rows(values_only=True)
+                header = next(row_iter, ())
+                preview = []
+                for row in row_iter:
+                    preview.append(row)
+                    if len(preview) >= nrows:
+                        break
+                info['parseMs'] = round((time.perf_counter() - start) * 1000, 2)
+                # trailing empty rows are not data (pd.read_excel drops them too)
+                start = time.perf_counter()
+                total_rows = len(preview)
+                while total_rows and all(v is None for v in preview[total_rows - 1]):
+                    total_rows -= 1
+                if len(preview) >= nrows:
+                    seen = len(preview)
+                    for row in row_iter:
+                        seen += 1
+                        if any(v is not None for v in row):
+                            total_rows = seen
+                info['countRowsMs'] = round((time.perf_counter() - start) * 1000, 2)
+            finally:
+                workbook.close()
+            headers = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+            rows = [
+                [('' if v is None else str(v)) for v in (list(row) + [None] * len(headers))[:len(headers)]]
+                for row in preview[:total_rows]
+            ]
+            return headers, rows, total_rows, info
+        except Exception as e:
+            print(f"[WARN] Streaming xlsx preview failed, falling back to a full read: {e}")
+
+    # .xls (xlrd loads the whole workbook anyway) and fallbacks
+    df, read_info = read_file_with_info(filepath)
+    info.update(read_info)
+    return [str(c) for c in df.columns], _preview_records(df.head(nrows)), len(df), info
+
+
+# Parsed uploads are snapshotted next to the file (pickle keeps dtypes and loads much faster
+# than re-running the CSV encoding loop or openpyxl), with a small per-process LRU on top.
+# Both are tagged with the source file's (mtime_ns, size) and ignored once the file at that path changes,
+# so nothing has to be evicted across processes when an upload is replaced or deleted.
+SNAPSHOT_SUFFIX = '.snapshot.pkl'
+SNAPSHOT_CACHE_SIZE = int(os.environ.get('SNAPSHOT_CACHE_SIZE', '4'))
+_snapshot_cache = OrderedDict()  # source filepath -> (source signature, DataFrame)
+_snapshot_lock = threading.Lock()
+
+def _snapshot_path(filepath):
+    return filepath + SNAPSHOT_SUFFIX
+
+def _source_signature(filepath):
+    stat = os.stat(filepath)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _remember_snapshot(filepath, source, df):
+    with _snapshot_lock:
+        _snapshot_cache[filepath] = (source, df)
+        _snapshot_cache.move_to_end(filepath)
+        while len(_snapshot_cache) > SNAPSHOT_CACHE_SIZE:
+            _snapshot_cache.popitem(last=False)
+
+def save_snapshot(filepath, df, source):
+    """Persist the parsed DataFrame of an uploaded file (parsed from the file as of `source`)."""
+    snapshot = _snapshot_path(filepath)
+    try:
+        tmp_path = f"{snapshot}.{os.getpid()}.tmp"
+        pd.to_pickle({'source': source, 'df': df}, tmp_path)
+        os.replace(tmp_path, snapshot)
+        _remember_snapshot(filepath, source, df)
+    except Exception as e:
+        print(f"[WARN] Could not write snapshot for {os.path.basename(filepath)}: {e}")
+
+def load_dataframe(filepath):
+    """
+    Return the parsed DataFrame of an uploaded file (treat it as read-only):
+    in-memory LRU first, then the on-disk snapshot, then a full read_file_safely parse.
+    Cached copies only count while the file still has the mtime and size they were parsed from.
+    """
+    source = _source_signature(filepath)
+    with _snapshot_lock:
+        cached = _snapshot_cache.get(filepath)
+        if cached is not None and cached[0] == source:
+            _snapshot_cache.move_to_end(filepath)
+            return cached[1]
+    snapshot = _snapshot_path(filepath)
+    if os.path.exists(snapshot):
+        try:
+            with tracing.span('load_snapshot') as s:
+                payload = pd.read_pickle(snapshot)
+                if isinstance(payload, dict) and payload.get('source') == source:
+                    df = payload['df']
+                    s.set(rows_out=len(df))
+                else:
+                    df = None
+            if df is not None:
+                print(f"[OK] Loaded parsed snapshot for {os.path.basename(filepath)}")
+                _remember_snapshot(filepath, source, df)
+                return df
+            print(f"[INFO] Snapshot of {os.path.basename(filepath)} is stale, parsing the file again")
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable snapshot {os.path.basename(snapshot)}: {e}")
+    with tracing.span('read_file_safely', bytes_in=source[1]) as s:
+        df = read_file_safely(filepath)
+        s.set(rows_out=len(df))
+    with tracing.span('save_snapshot'):
+        save_snapshot(filepath, df, source)
+    return df
 
 HEADER_FILL = PatternFill(start_color='E2E8F0', end_color='E2E8F0', fill_type='solid')
 HEADER_FONT = Font(color='1E293B', bold=True)
@@ -187,6 +469,138 @@ def _style_excel_sheet(worksheet, *, freeze_pane='A2', numeric_formats=None):
 
 
 
+def _column_width(header, series, min_width=12, max_width=60):
+    """Same rule as _auto_fit_columns (longest str() line + 4, clamped), from vectorized string lengths."""
+    text = series.dropna().astype(str)
+    lengths = [len(line) for line in str(header).splitlines()] or [0]
+    if not text.empty:
+        if text.str.contains('\n', regex=False).any():
+            text = text.str.split('\n').explode()
+        lengths.append(int(text.str.len().max()))
+    return max(min_width, min(max(lengths) + 4, max_width))
+
+_ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _xml_text(value):
+    text = _ILLEGAL_XML_CHARS.sub('', value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\r', '&#13;')
+    stripped = value.strip()
+    return ('<t xml:space="preserve">' if stripped and stripped != value else '<t>') + text + '</t>'
+
+def _sheet_rows_xml(df, cell_styles, start_row=2):
+    """
+    <row> elements for df, matching what openpyxl writes for the styled template cells:
+    numbers (and bools) get the column's number style, text and empty cells its text style.
+    cell_styles[i] is the (text style id, number style id) pair of column i.
+    """
+    columns = []
+    for i in range(df.shape[1]):
+        letter = get_column_letter(i + 1)
+        text_style, number_style = cell_styles[i]
+        cells = []
+        for row_idx, value in enumerate(df.iloc[:, i].tolist(), start=start_row):
+            ref = f'{letter}{row_idx}'
+            if value is None or (isinstance(value, float) and (math.isnan(value) or math.isinf(value))):
+                cells.append(f'<c r="{ref}" s="{text_style}"/>')
+            elif isinstance(value, (bool, np.bool_)):
+                cells.append(f'<c r="{ref}" s="{number_style}" t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, float, np.integer, np.floating)):
+                cells.append(f'<c r="{ref}" s="{number_style}" t="n"><v>{"%.16g" % value}</v></c>')
+            else:
+                value = str(value)
+                if value == '':
+                    cells.append(f'<c r="{ref}" s="{text_style}" t="inlineStr"/>')
+                else:
+                    cells.append(f'<c r="{ref}" s="{text_style}" t="inlineStr"><is>{_xml_text(value)}</is></c>')
+        columns.append(cells)
+    return [f'<row r="{row_idx}">' + ''.join(cells) + '</row>'
+            for row_idx, cells in enumerate(zip(*columns), start=start_row)]
+
+def write_fast_excel(filepath, title, df, *, freeze_pane='A2', numeric_formats=None):
+    """
+    High-throughput equivalent of to_excel + _style_excel_sheet (same look, one sheet).
+    openpyxl (write-only) writes the workbook shell: styles, column widths, frozen pane and the header row.
+    Styles are resolved once per column (a text and a number style), and the data rows are then
+    generated as sheet XML strings and spliced into the saved package instead of going through
+    per-cell openpyxl objects.
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title)
+    if freeze_pane:
+        worksheet.freeze_panes = freeze_pane
+    formats = {name.strip().lower(): number_format for name, number_format in (numeric_formats or {}).items()}
+
+    header_cells, cell_styles = [], []
+    for idx, column in enumerate(df.columns, start=1):
+        worksheet.column_dimensions[get_column_letter(idx)].width = _column_width(column, df.iloc[:, idx - 1])
+        header = WriteOnlyCell(worksheet, value=column)
+        header.font, header.fill, header.alignment, header.border = HEADER_FONT, HEADER_FILL, HEADER_ALIGNMENT, THIN_BORDER
+        header_cells.append(header)
+        text = WriteOnlyCell(worksheet)
+        text.alignment, text.border = TEXT_ALIGNMENT, THIN_BORDER
+        number = WriteOnlyCell(worksheet)
+        number.alignment, number.border = NUMBER_ALIGNMENT, THIN_BORDER
+        number_format = formats.get(str(column).strip().lower())
+        if number_format:
+            number.number_format = number_format
+        # style_id registers the style with the workbook, so it is written to styles.xml
+        cell_styles.append((text.style_id, number.style_id))
+    worksheet.append(header_cells)
+    workbook.save(filepath)
+
+    sheet_part = worksheet.path.lstrip('/')
+    rows_xml = _sheet_rows_xml(df, cell_styles)
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(filepath) as src, zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename != sheet_part:
+                dst.writestr(item, data)
+                continue
+            head, tail = data.decode('utf-8').split('</sheetData>', 1)
+            with dst.open(item.filename, 'w') as out:
+                out.write(head.encode('utf-8'))
+                for start in range(0, len(rows_xml), 10000):
+                    out.write(''.join(rows_xml[start:start + 10000]).encode('utf-8'))
+                out.write(('</sheetData>' + tail).encode('utf-8'))
+    os.replace(tmp_path, filepath)
+
+RULE_EXPORT_COLUMNS = ['Antecedents', 'Consequents', 'Support', 'Confidence', 'Lift']
+RULE_EXPORT_FORMATS = {'Support': '0.000000', 'Confidence': '0.000000', 'Lift': '0.000000'}
+RESULT_SET_PREFIX = 'resultset_'
+CSV_STREAM_EXPORT_ROWS = 20000
+EXPORT_EXTENSIONS = {'excel': 'xlsx', 'csv': 'csv'}
+_EXPORT_NAME_RE = re.compile(r'^association_rules_.+_([0-9a-f]{16})\.(xlsx|csv)$')
+
+def export_rules_frame(results):
+    """Rules table of an analysis result as the DataFrame written to the download files."""
+    results_dict = results or {}
+    if not isinstance(results_dict, dict):
+        results_dict = dict(results_dict) if hasattr(results, 'items') else {}
+
+    rules_df = pd.DataFrame(results_dict.get('rulesTable') or [])
+    if rules_df.empty:
+        rules_df = pd.DataFrame(columns=RULE_EXPORT_COLUMNS)
+
+    primary_columns = [col for col in RULE_EXPORT_COLUMNS if col in rules_df.columns]
+    extra_columns = [col for col in rules_df.columns if col not in primary_columns]
+    ordered_columns = primary_columns + extra_columns if primary_columns or extra_columns else rules_df.columns.tolist()
+    return rules_df[ordered_columns] if ordered_columns else rules_df
+
+def write_rules_excel(filepath, export_rules_df):
+    if EXCEL_EXPORT_MODE == 'fast':
+        write_fast_excel(filepath, 'Association Rules', export_rules_df, freeze_pane='A2', numeric_formats=RULE_EXPORT_FORMATS)
+        return
+    with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+        export_rules_df.to_excel(writer, sheet_name='Association Rules', index=False)
+        rules_ws = writer.sheets.get('Association Rules')
+        _style_excel_sheet(rules_ws, freeze_pane='A2', numeric_formats=RULE_EXPORT_FORMATS)
+
+        workbook = writer.book
+        try:
+            workbook.active = workbook.sheetnames.index('Association Rules')
+        except Exception:
+            workbook.active = 0
+
 def create_download_files(results, filename):
     "Create download files (Excel and CSV)."
     try:
@@ -194,41 +608,19 @@ def create_download_files(results, filename):
         timestamp = timestamp_dt.strftime('%Y%m%d_%H%M%S')
         base_name = filename.rsplit('.', 1)[0] if '.' in filename else filename
 
-        results_dict = results or {}
-        if not isinstance(results_dict, dict):
-            results_dict = dict(results_dict) if hasattr(results, 'items') else {}
-
         output_files = {}
-
-        rules_df = pd.DataFrame(results_dict.get('rulesTable') or [])
-        if rules_df.empty:
-            rules_df = pd.DataFrame(columns=['Antecedents', 'Consequents', 'Support', 'Confidence', 'Lift'])
-
-        preferred_columns = ['Antecedents', 'Consequents', 'Support', 'Confidence', 'Lift']
-        primary_columns = [col for col in preferred_columns if col in rules_df.columns]
-        extra_columns = [col for col in rules_df.columns if col not in primary_columns]
-        ordered_columns = primary_columns + extra_columns if primary_columns or extra_columns else rules_df.columns.tolist()
-        export_rules_df = rules_df[ordered_columns] if ordered_columns else rules_df
+        export_rules_df = export_rules_frame(results)
 
         excel_filename = f"association_rules_{base_name}_{timestamp}.xlsx"
         excel_filepath = os.path.join(UPLOAD_FOLDER, excel_filename)
-
-        with pd.ExcelWriter(excel_filepath, engine='openpyxl') as writer:
-            export_rules_df.to_excel(writer, sheet_name='Association Rules', index=False)
-            rules_ws = writer.sheets.get('Association Rules')
-            _style_excel_sheet(rules_ws, freeze_pane='A2', numeric_formats={'Support': '0.000000', 'Confidence': '0.000000', 'Lift': '0.000000'})
-
-            workbook = writer.book
-            try:
-                workbook.active = workbook.sheetnames.index('Association Rules')
-            except Exception:
-                workbook.active = 0
-
+        with tracing.span('excel_export', rows_in=len(export_rules_df), mode=EXCEL_EXPORT_MODE):
+            write_rules_excel(excel_filepath, export_rules_df)
         output_files['excel'] = excel_filename
 
         csv_filename = f"association_rules_{base_name}_{timestamp}.csv"
         csv_filepath = os.path.join(UPLOAD_FOLDER, csv_filename)
-        export_rules_df.to_csv(csv_filepath, index=False, encoding='utf-8-sig')
+        with tracing.span('csv_export', rows_in=len(export_rules_df)):
+            export_rules_df.to_csv(csv_filepath, index=False, encoding='utf-8-sig')
         output_files['csv'] = csv_filename
 
         return True, output_files
@@ -237,7 +629,253 @@ def create_download_files(results, filename):
         print(f"[ERROR] Error creating download files: {str(e)}")
         return False, str(e)
 
+# Result sets: a finished analysis stores its RuleIndex (rules plus the frequent itemsets table) on disk.
+# /api/results pages through it and /api/download writes the xlsx/csv files the first time each is requested.
+RESULTS_PAGE_SIZE = int(os.environ.get('RESULTS_PAGE_SIZE', '50'))
+RESULTS_MAX_PAGE_SIZE = 1000
+RESULT_SET_CACHE_SIZE = int(os.environ.get('RESULT_SET_CACHE_SIZE', '4'))
+_result_set_cache = OrderedDict()  # key -> (result set mtime, RuleIndex)
+_result_set_lock = threading.Lock()
+_RESULT_KEY_RE = re.compile(r'^[0-9a-f]{16}$')
+
+def result_set_key(fingerprint, params):
+    """Stable key for the results of one dataset (content fingerprint) analyzed with one set of parameters."""
+    payload = json.dumps([RESULT_CACHE_VERSION, fingerprint, params], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+def _result_set_path(key):
+    return os.path.join(UPLOAD_FOLDER, f"{RESULT_SET_PREFIX}{key}.pkl")
 
+def save_result_set(key, rule_index):
+    """Persist the RuleIndex of an analysis; returns False when it could not be written."""
+    path = _result_set_path(key)
+    try:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pd.to_pickle(rule_index, tmp_path)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"[WARN] Could not write result set {key}: {e}")
+        return False
+
+def load_result_set(key):
+    """RuleIndex stored under key (None if unknown or expired); recently used ones stay in memory."""
+    if not key or not _RESULT_KEY_RE.match(key):
+        return None
+    path = _result_set_path(key)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _result_set_lock:
+        cached = _result_set_cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            _result_set_cache.move_to_end(key)
+            return cached[1]
+    try:
+        rule_index = pd.read_pickle(path)
+    except Exception as e:
+        print(f"[WARN] Ignoring unreadable result set {key}: {e}")
+        return None
+    with _result_set_lock:
+        _result_set_cache[key] = (mtime, rule_index)
+        _result_set_cache.move_to_end(key)
+        while len(_result_set_cache) > RESULT_SET_CACHE_SIZE:
+            _result_set_cache.popitem(last=False)
+    return rule_index
+
+def export_filenames(filename, key):
+    """Download names for a result set; the key in the name lets /api/download rebuild them."""
+    base_name = filename.rsplit('.', 1)[0] if '.' in filename else filename
+    return {fmt: f"association_rules_{base_name}_{key}.{ext}" for fmt, ext in EXPORT_EXTENSIONS.items()}
+
+def _export_result_key(download_name, format):
+    match = _EXPORT_NAME_RE.match(download_name)
+    if not match or match.group(2) != EXPORT_EXTENSIONS[format]:
+        return None
+    return match.group(1)
+
+def build_excel_export(filepath, export_rules_df):
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        with tracing.span('excel_export', rows_in=len(export_rules_df), mode=EXCEL_EXPORT_MODE):
+            write_rules_excel(tmp_path, export_rules_df)
+        os.replace(tmp_path, filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def stream_csv_export(filepath, export_rules_df, chunk_rows=CSV_STREAM_EXPORT_ROWS):
+    """
+    Yield the CSV export (utf-8 with BOM, like to_csv(encoding='utf-8-sig')) chunk by chunk
+    while writing the same bytes to filepath, so the next request is served from disk.
+    """
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.part"
+    completed = False
+    try:
+        with open(tmp_path, 'wb') as out:
+            for start in range(0, max(len(export_rules_df), 1), chunk_rows):
+                chunk = export_rules_df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0)
+                data = (codecs.BOM_UTF8 if start == 0 else b'') + chunk.encode('utf-8')
+                out.write(data)
+                yield data
+        os.replace(tmp_path, filepath)
+        completed = True
+    finally:
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Result cache in front of BasketAnalyzer: pressing "process" again on the same data with the same
+# parameters reuses the stored analysis instead of mining again. The key is the result set key, i.e. a
+# content hash of the selected columns plus the mining parameters, so a re-uploaded file with new
+# contents misses. Tiers: a per-process LRU bounded by RESULT_CACHE_MAX_BYTES, then
+# resultcache_<key>.json in UPLOAD_FOLDER. Entries idle for RESULT_CACHE_TTL seconds expire (checked
+# on lookup and by cleanup_old_files), and a hit needs the result set file to still be there.
+RESULT_CACHE_VERSION = 2
+RESULT_CACHE_PREFIX = 'resultcache_'
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', '3600'))
+FINGERPRINT_MEMO_SIZE = 256
+_result_cache = OrderedDict()  # key -> [entry, size in bytes, last used]
+_result_cache_bytes = 0
+_result_cache_lock = threading.Lock()
+_fingerprint_memo = OrderedDict()  # (filepath, mtime_ns, size, columns) -> content fingerprint
+
+def frame_fingerprint(df):
+    """Content hash of a DataFrame: column names, dtypes and values (not the index)."""
+    digest = hashlib.sha1(json.dumps([[str(c) for c in df.columns], [str(t) for t in df.dtypes]]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def file_fingerprint(filepath, selected_columns, block_size=1024 * 1024):
+    """Content hash of a file read without parsing (streamed CSVs) together with the column selection."""
+    digest = hashlib.sha1(json.dumps(list(selected_columns or [])).encode('utf-8'))
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _fingerprint_memo_key(filepath, selected_columns):
+    stat = os.stat(filepath)
+    return (filepath, stat.st_mtime_ns, stat.st_size, tuple(selected_columns or ()))
+
+def remembered_fingerprint(filepath, selected_columns):
+    """Fingerprint computed earlier in this process for the unchanged file (None if unknown)."""
+    memo_key = _fingerprint_memo_key(filepath, selected_columns)
+    with _result_cache_lock:
+        fingerprint = _fingerprint_memo.get(memo_key)
+        if fingerprint is not None:
+            _fingerprint_memo.move_to_end(memo_key)
+        return fingerprint
+
+def remember_fingerprint(filepath, selected_columns, fingerprint):
+    memo_key = _fingerprint_memo_key(filepath, selected_columns)
+    with _result_cache_lock:
+        _fingerprint_memo[memo_key] = fingerprint
+        _fingerprint_memo.move_to_end(memo_key)
+        while len(_fingerprint_memo) > FINGERPRINT_MEMO_SIZE:
+            _fingerprint_memo.popitem(last=False)
+
+def _result_cache_path(key):
+    return os.path.join(UPLOAD_FOLDER, f"{RESULT_CACHE_PREFIX}{key}.json")
+
+def _remember_result(key, entry, size):
+    global _result_cache_bytes
+    with _result_cache_lock:
+        old = _result_cache.pop(key, None)
+        if old is not None:
+            _result_cache_bytes -= old[1]
+        if size > RESULT_CACHE_MAX_BYTES:
+            return
+        _result_cache[key] = [entry, size, time.time()]
+        _result_cache_bytes += size
+        while _result_cache_bytes > RESULT_CACHE_MAX_BYTES:
+            _, (_, evicted_size, _) = _result_cache.popitem(last=False)
+            _result_cache_bytes -= evicted_size
+
+def evict_cached_result(key):
+    """Drop a cached analysis from this process's memory tier."""
+    global _result_cache_bytes
+    with _result_cache_lock:
+        old = _result_cache.pop(key, None)
+        if old is not None:
+            _result_cache_bytes -= old[1]
+
+def _touch(path):
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+def cache_result(key, results, counts):
+    """Store the first-page results and summary counts of an analysis whose result set is saved under key."""
+    entry = {'version': RESULT_CACHE_VERSION, 'results': results, 'counts': counts}
+    try:
+        data = json.dumps(entry, ensure_ascii=False)
+    except (TypeError, ValueError) as e:
+        print(f"[WARN] Could not cache result {key}: {e}")
+        return
+    _remember_result(key, entry, len(data))
+    path = _result_cache_path(key)
+    try:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[WARN] Could not write result cache {key}: {e}")
+
+def cached_result(key):
+    """
+    (results, counts) cached under key, or None. Looks in memory, then on disk; counts hits and misses
+    (JobManager counters result_cache_memory_hits, result_cache_disk_hits, result_cache_misses).
+    """
+    now = time.time()
+    with _result_cache_lock:
+        slot = _result_cache.get(key)
+        if slot is not None:
+            _result_cache.move_to_end(key)
+    if slot is not None:
+        if now - slot[2] <= RESULT_CACHE_TTL and _touch(_result_set_path(key)):
+            slot[2] = now
+            _touch(_result_cache_path(key))
+            report_counter('result_cache_memory_hits')
+            return slot[0]['results'], slot[0]['counts']
+        evict_cached_result(key)
+
+    path = _result_cache_path(key)
+    try:
+        age = now - os.path.getmtime(path)
+    except OSError:
+        age = None
+    if age is not None and age <= RESULT_CACHE_TTL and _touch(_result_set_path(key)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = f.read()
+            entry = json.loads(data)
+            if entry.get('version') == RESULT_CACHE_VERSION:
+                _touch(path)
+                _remember_result(key, entry, len(data))
+                report_counter('result_cache_disk_hits')
+                return entry['results'], entry['counts']
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable result cache {key}: {e}")
+    report_counter('result_cache_misses')
+    return None
+
+def result_cache_stats():
+    counters = JOB_MANAGER.counters()
+    memory_hits = counters.get('result_cache_memory_hits', 0)
+    disk_hits = counters.get('result_cache_disk_hits', 0)
+    return {
+        'hits': memory_hits + disk_hits,
+        'memoryHits': memory_hits,
+        'diskHits': disk_hits,
+        'misses': counters.get('result_cache_misses', 0),
+        'maxBytes': RESULT_CACHE_MAX_BYTES,
+        'ttlSeconds': RESULT_CACHE_TTL
+    }
 
 
 @app.route('/api/health', methods=['GET'])
@@ -246,9 +884,27 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'message': 'Market Basket Analysis API is running successfully'
+        'message': 'Market Basket Analysis API is running successfully',
+        'jobs': JOB_MANAGER.stats(),
+        'resultCache': result_cache_stats()
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text format: stage duration histograms, jobs by status and the job counters."""
+    counters = JOB_MANAGER.counters()
+    lines = tracing.prometheus_histograms(counters, f'{METRICS_PREFIX}stage_seconds')
+
+    lines += [f'# HELP {METRICS_PREFIX}jobs Jobs currently known to the job manager by status.',
+              f'# TYPE {METRICS_PREFIX}jobs gauge']
+    for status, count in sorted(JOB_MANAGER.stats()['jobs'].items()):
+        lines.append(f'{METRICS_PREFIX}jobs{{status="{status}"}} {count}')
+
+    for name in sorted(name for name in counters if isinstance(name, str)):
+        metric = METRICS_PREFIX + re.sub(r'[^a-zA-Z0-9_]', '_', name) + '_total'
+        lines += [f'# TYPE {metric} counter', f'{metric} {counters[name]}']
+    return Response('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """Upload an Excel/CSV file and return JSON data."""
@@ -275,40 +931,27 @@ def upload_file():
         
         print(f"[INFO] File saved as: {filename}")
         
-        # Read data from the file
-        df = read_file_safely(filepath)
-        
-        # Basic cleanup
-        df = df.fillna('')
-        
-        # Convert data to a list of lists for the frontend
-        headers = [str(col) for col in df.columns.tolist()]
-        rows = []
-        
-        # Limit preview output to the first 1000 rows
-        display_df = df.head(1000)
-        
-        for _, row in display_df.iterrows():
-            row_data = []
-            for value in row:
-                if pd.isna(value) or value is None:
-                    row_data.append('')
-                else:
-                    row_data.append(str(value))
-            rows.append(row_data)
+        # Read only a preview; the full parse (and its snapshot) happens once, in /api/process
+        headers, rows, total_rows, read_info = read_preview(filepath)
         
         data = [headers] + rows
         
-        print(f"[INFO] File processed successfully. Total rows: {len(df)}, Display rows: {len(rows)}, Columns: {len(headers)}")
+        print(f"[INFO] File processed successfully. Total rows: {total_rows}, Display rows: {len(rows)}, Columns: {len(headers)}")
         
         response_data = {
             'success': True,
             'filename': filename,
             'data': data,
-            'rows': len(df),
+            'rows': total_rows,
             'columns': len(headers),
             'column_names': headers,
-            'file_size': os.path.getsize(filepath)
+            'file_size': os.path.getsize(filepath),
+            'encoding': read_info['encoding'],
+            'timings': {
+                'detectEncodingMs': read_info['detectEncodingMs'],
+                'parseMs': read_info['parseMs'],
+                'countRowsMs': read_info['countRowsMs']
+            }
         }
         
         return jsonify(response_data)
@@ -318,9 +961,189 @@ def upload_file():
         print(f"[ERROR] Upload error: {str(e)}")
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
+def upload_column_count(filepath):
+    """Number of columns of an upload, read from its header row (the .xls reader parses the whole file)."""
+    lower = filepath.lower()
+    if lower.endswith('.csv'):
+        header = pd.read_csv(filepath, nrows=0, encoding=detect_csv_encoding(filepath), encoding_errors='replace')
+        return len(header.columns)
+    if lower.endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            return len(next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ()))
+        finally:
+            workbook.close()
+    return len(load_dataframe(filepath).columns)
+
+def _load_selected(filepath, selected_columns):
+    """(full DataFrame, selected columns) of an upload, from the parsed snapshot when available."""
+    df = load_dataframe(filepath)
+    print(f"[INFO] File read successfully. Shape: {df.shape}")
+
+    # Slice to the requested columns when provided
+    if not selected_columns:
+        return df, df
+    try:
+        selected_df = df.iloc[:, selected_columns]
+    except IndexError:
+        raise ValueError('Selected columns are out of range')
+    print(f"[INFO] Selected columns: {selected_df.columns.tolist()}")
+    return df, selected_df
+
+def run_basket_job(filename, selected_columns, options):
+    """
+    Market basket analysis workflow; runs on the job pool, not in the request thread.
+    With STAGE_TRACING the payload carries the spans of every stage in results['analysis']['spans']
+    and their durations go to the /api/metrics histograms (as job counters).
+    """
+    with tracing.trace() as trace:
+        try:
+            with tracing.span('job'):
+                payload = _run_basket_job(filename, selected_columns, options)
+        finally:
+            for name, amount in tracing.histogram_counts(trace.spans).items():
+                report_counter(name, amount)
+    if trace.enabled:
+        # cached results share their dicts with the result cache: replace, don't mutate
+        results = payload['results']
+        payload['results'] = {**results, 'analysis': {**results.get('analysis', {}), 'spans': trace.spans}}
+    return payload
+
+def _run_basket_job(filename, selected_columns, options):
+    report_progress(5, 'reading')
+
+    filepath = os.path.join(UPLOAD_FOLDER, filename)
+    analyzer = BasketAnalyzer(min_support=0.001, min_lift=1.0, workers=MINING_WORKERS, **options)
+    streaming = should_stream(filepath)
+
+    # Identify the data by content so a repeated request can be answered from the result cache
+    df = selected_df = None
+    fingerprint = remembered_fingerprint(filepath, selected_columns)
+    if fingerprint is None:
+        if streaming:
+            with tracing.span('fingerprint', source='file'):
+                fingerprint = file_fingerprint(filepath, selected_columns)
+        else:
+            df, selected_df = _load_selected(filepath, selected_columns)
+            with tracing.span('fingerprint', source='frame', rows_in=len(selected_df)):
+                fingerprint = frame_fingerprint(selected_df)
+        remember_fingerprint(filepath, selected_columns, fingerprint)
+    result_key = result_set_key(fingerprint, {
+        'min_support': analyzer.min_support, 'min_lift': analyzer.min_lift, **options})
+
+    with tracing.span('result_cache_lookup') as s:
+        cached = cached_result(result_key)
+        s.set(hit=cached is not None)
+    if cached is not None:
+        print(f"[INFO] Reusing cached analysis {result_key}")
+        results, counts = cached
+        return _basket_job_payload(results, filename, selected_columns, counts, result_key)
+
+    if streaming:
+        # Large CSV: stream it in chunks instead of materializing the whole frame
+        print(f"[INFO] Streaming CSV in chunks of {CSV_STREAM_CHUNK_ROWS} rows...")
+        report_progress(20, 'mining')
+        encoding = detect_csv_encoding(filepath)
+        header = pd.read_csv(filepath, nrows=0, encoding=encoding, encoding_errors='replace')
+        if selected_columns and max(selected_columns) >= len(header.columns):
+            raise ValueError('Selected columns are out of range')
+        results = analyzer.analyze_csv(
+            filepath,
+            usecols=selected_columns or None,
+            chunksize=CSV_STREAM_CHUNK_ROWS,
+            sep=',',
+            encoding=encoding
+        )
+        stream_stats = (results.get('meta') or {}).get('streaming', {})
+        if stream_stats.get('encodingErrors'):
+            print(f"[WARN] {encoding} failed past the sampled bytes, replaced undecodable characters")
+        n_rows = stream_stats.get('n_rows', 0)
+        n_columns = len(header.columns)
+        n_selected = len(selected_columns) if selected_columns else n_columns
+        return _finish_basket_job(results, filename, selected_columns, n_rows, n_rows, n_selected, n_columns, result_key, analyzer.rule_index)
+
+    # Load the entire dataset (parsed snapshot from the upload step when available)
+    if df is None:
+        df, selected_df = _load_selected(filepath, selected_columns)
+
+    # Run the basket analysis
+    print(f"[INFO] Running Market Basket Analysis...")
+    report_progress(20, 'mining')
+
+    results = analyzer.analyze_basket(selected_df, df)
+    n_selected = len(selected_columns) if selected_columns else len(df.columns)
+    return _finish_basket_job(results, filename, selected_columns, len(df), len(selected_df), n_selected, len(df.columns), result_key, analyzer.rule_index)
+
+def _finish_basket_job(results, filename, selected_columns, total_rows, processed_rows, n_selected, total_columns, result_key, rule_index):
+    if not results.get('success'):
+        raise RuntimeError(results.get('error', 'Analysis failed'))
+
+    print("[INFO] Analysis completed")
+
+    counts = {
+        'totalRows': total_rows,
+        'processedRows': processed_rows,
+        'selectedColumns': n_selected,
+        'totalColumns': total_columns
+    }
+
+    # Keep the rules server-side: the response carries the first page, /api/results serves the rest
+    # and the download files are built on first download
+    report_progress(80, 'saving results')
+    with tracing.span('save_result_set', rows_in=len(rule_index)):
+        saved = save_result_set(result_key, rule_index)
+    if not saved:
+        return _basket_job_payload(results, filename, selected_columns, counts, None)
+
+    total_rules = len(rule_index)
+    results['rulesTable'] = rule_index.rows(range(min(RESULTS_PAGE_SIZE, total_rules)))
+    results['frequentItemsetsTable'] = results.get('frequentItemsetsTable', [])[:RESULTS_PAGE_SIZE]
+    results['resultId'] = result_key
+    results['rulesPage'] = {
+        'offset': 0,
+        'limit': RESULTS_PAGE_SIZE,
+        'total': total_rules,
+        'url': f'/api/results/{result_key}/rules'
+    }
+    results['itemsetsPage'] = {
+        'offset': 0,
+        'limit': RESULTS_PAGE_SIZE,
+        'total': len(rule_index.itemsets),
+        'url': f'/api/results/{result_key}/itemsets'
+    }
+    with tracing.span('cache_result'):
+        cache_result(result_key, results, counts)
+    return _basket_job_payload(results, filename, selected_columns, counts, result_key)
+
+def _basket_job_payload(results, filename, selected_columns, counts, result_key):
+    """Job result for /api/jobs; download names follow this request's filename (cached results are shared)."""
+    results = dict(results)
+    output_files = export_filenames(filename, result_key) if result_key else {}
+
+    existing_output_files = results.get('outputFiles') if isinstance(results.get('outputFiles'), dict) else {}
+    results['outputFiles'] = {**existing_output_files, **output_files}
+    results['downloadUrls'] = {**output_files}
+
+    print("[INFO] Processing completed successfully")
+
+    return {
+        'success': True,
+        'analysisType': 'basket',
+        'selectedColumns': selected_columns,
+        'results': results,
+        'outputFiles': output_files,
+        'downloadUrls': output_files,
+        'summary': {
+            **counts,
+            'processingTime': 'Completed',
+            'completedAt': datetime.now().isoformat()
+        }
+    }
+
 @app.route('/api/process', methods=['POST'])
 def process_data():
-    """Run the market basket analysis workflow."""
+    """Queue the market basket analysis workflow and return a job ID to poll."""
     try:
         print("[INFO] Starting Market Basket Analysis...")
         data = request.get_json()
@@ -330,86 +1153,80 @@ def process_data():
         
         filename = data.get('filename')
         selected_columns = data.get('selectedColumns', [])
-        
-        print(f"[INFO] Processing: {filename}, Columns: {len(selected_columns)}")
-        
+        options = {'algorithm': data.get('algorithm') or 'apriori'}
+        if data.get('topK') is not None:
+            # Optional top-K mode: keep only the best rules by topBy (lift, confidence or support)
+            try:
+                options['top_k'] = int(data['topK'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'topK must be an integer'}), 400
+            options['top_by'] = data.get('topBy') or 'lift'
+        if data.get('minConfidence') is not None:
+            try:
+                options['min_confidence'] = float(data['minConfidence'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'minConfidence must be a number'}), 400
+
         if not filename:
             return jsonify({'error': 'Missing filename'}), 400
         
-        # Read the uploaded file
         filepath = os.path.join(UPLOAD_FOLDER, filename)
         if not os.path.exists(filepath):
             return jsonify({'error': 'File not found'}), 404
-        
-        # Load the entire dataset
-        df = read_file_safely(filepath)
-        print(f"[INFO] File read successfully. Shape: {df.shape}")
-        
-        # Slice to the requested columns when provided
+
+        # Validate parameters here so bad requests fail fast instead of as a failed job
+        try:
+            BasketAnalyzer(**options)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         if selected_columns:
+            if not isinstance(selected_columns, list) or not all(
+                    isinstance(c, int) and not isinstance(c, bool) for c in selected_columns):
+                return jsonify({'error': 'selectedColumns must be a list of column indexes'}), 400
             try:
-                selected_df = df.iloc[:, selected_columns]
-                print(f"[INFO] Selected columns: {selected_df.columns.tolist()}")
-            except IndexError:
+                n_columns = upload_column_count(filepath)
+            except Exception as e:
+                return jsonify({'error': f'Unable to read the file: {str(e)}'}), 400
+            if min(selected_columns) < 0 or max(selected_columns) >= n_columns:
                 return jsonify({'error': 'Selected columns are out of range'}), 400
-        else:
-            selected_df = df
-        
-        # Run the basket analysis
-        print(f"[INFO] Running Market Basket Analysis...")
-        
-        analyzer = BasketAnalyzer(min_support=0.001, min_lift=1.0)
-        results = analyzer.analyze_basket(selected_df, df)
-        
-        if not results.get('success'):
-            return jsonify({'error': results.get('error', 'Analysis failed')}), 500
-        
-        print("[INFO] Analysis completed")
-        
-        # Create downloadable files
-        print("[INFO] Creating download files...")
-        success, output_files = create_download_files(results, filename)
-        
-        if not success:
-            print(f"[WARN] Could not create all download files: {output_files}")
-            output_files = {}
-        
 
-        if isinstance(results, dict):
-            try:
-                existing_output_files = results.get('outputFiles') if isinstance(results.get('outputFiles'), dict) else {}
-                merged_output_files = {**existing_output_files, **output_files}
-                results['outputFiles'] = merged_output_files
-                results['downloadUrls'] = {**output_files}
-            except Exception as merge_error:
-                print(f"[WARN] Could not attach download metadata to results: {merge_error}")
+        try:
+            job_id = JOB_MANAGER.submit(run_basket_job, filename, selected_columns, options)
+        except JobQueueFull as e:
+            return jsonify({'error': str(e)}), 503
 
-        print("[INFO] Processing completed successfully")
+        print(f"[INFO] Queued job {job_id} for {filename}")
 
-        response_payload = {
+        return jsonify({
             'success': True,
-            'analysisType': 'basket',
-            'selectedColumns': selected_columns,
-            'results': results,
-            'outputFiles': output_files,
-            'downloadUrls': output_files,
-            'summary': {
-                'totalRows': len(df),
-                'processedRows': len(selected_df),
-                'selectedColumns': len(selected_columns) if selected_columns else len(df.columns),
-                'totalColumns': len(df.columns),
-                'processingTime': 'Completed',
-                'completedAt': datetime.now().isoformat()
-            }
-        }
-
-        return jsonify(response_payload)
-
+            'jobId': job_id,
+            'status': 'queued',
+            'statusUrl': f'/api/jobs/{job_id}'
+        }), 202
 
     except Exception as e:
         logger.error(f"Processing error: {str(e)}", exc_info=True)
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Return status, progress and (once finished) the results of a processing job."""
+    job = JOB_MANAGER.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running processing job. A running job cannot be interrupted: it keeps its pool
+    slot until the analysis finishes (the response carries a `note` saying so) and its result is dropped.
+    """
+    job = JOB_MANAGER.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
 
 
 @app.route('/api/download/<format>/<path:filename>', methods=['GET'])
@@ -426,13 +1243,29 @@ def download_file(format, filename):
 
         decoded_filename = unquote(filename)
         safe_path = safe_join(UPLOAD_FOLDER, decoded_filename)
+        download_name = os.path.basename(decoded_filename)
+
+        if safe_path and not os.path.exists(safe_path):
+            # First request for this export: build it from the stored result set
+            with tracing.trace() as trace:
+                rule_index = load_result_set(_export_result_key(download_name, format))
+                if rule_index is not None:
+                    with tracing.span('export_frame', rows_in=len(rule_index)):
+                        export_rules_df = rule_index.to_frame()
+                    if format == 'excel':
+                        build_excel_export(safe_path, export_rules_df)
+            JOB_MANAGER.add_counters(tracing.histogram_counts(trace.spans))
+            if rule_index is not None and format == 'csv':
+                return Response(
+                    stream_with_context(stream_csv_export(safe_path, export_rules_df)),
+                    mimetype=valid_formats[format],
+                    headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(download_name)}"}
+                )
 
         if not safe_path or not os.path.exists(safe_path):
             logger.warning('Download request missing file: %s', filename)
             return jsonify({'error': 'File not found'}), 404
 
-        download_name = os.path.basename(decoded_filename)
-
         return send_file(
             safe_path,
             as_attachment=True,
@@ -444,9 +1277,57 @@ def download_file(format, filename):
         logger.error(f"Download error: {str(e)}", exc_info=True)
         return jsonify({'error': f'Download failed: {str(e)}'}), 500
 
+@app.route('/api/results/<result_id>/rules', methods=['GET'])
+def result_rules(result_id):
+    """One page of a stored rule set: ?offset&limit&sort=-lift&min_lift&contains=item (repeatable)."""
+    rule_index = load_result_set(result_id)
+    if rule_index is None:
+        return jsonify({'success': False, 'error': 'Result not found or expired'}), 404
+
+    try:
+        offset = max(0, request.args.get('offset', 0, type=int) or 0)
+        limit = request.args.get('limit', RESULTS_PAGE_SIZE, type=int)
+        limit = min(max(1, RESULTS_PAGE_SIZE if limit is None else limit), RESULTS_MAX_PAGE_SIZE)
+        sort = request.args.get('sort', DEFAULT_SORT)
+        min_lift = request.args.get('min_lift', type=float)
+        contains = [item for item in request.args.getlist('contains') if item]
+        total, rules = rule_index.query(offset=offset, limit=limit, sort=sort, min_lift=min_lift, contains=contains)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'resultId': result_id,
+        'offset': offset,
+        'limit': limit,
+        'sort': sort,
+        'total': total,
+        'rules': rules
+    })
+
+@app.route('/api/results/<result_id>/itemsets', methods=['GET'])
+def result_itemsets(result_id):
+    """One page of the frequent itemsets table of a stored result: ?offset&limit."""
+    rule_index = load_result_set(result_id)
+    if rule_index is None:
+        return jsonify({'success': False, 'error': 'Result not found or expired'}), 404
+
+    offset = max(0, request.args.get('offset', 0, type=int) or 0)
+    limit = request.args.get('limit', RESULTS_PAGE_SIZE, type=int)
+    limit = min(max(1, RESULTS_PAGE_SIZE if limit is None else limit), RESULTS_MAX_PAGE_SIZE)
+    total, itemsets = rule_index.itemsets_page(offset=offset, limit=limit)
+    return jsonify({
+        'success': True,
+        'resultId': result_id,
+        'offset': offset,
+        'limit': limit,
+        'total': total,
+        'itemsets': itemsets
+    })
+
 # Remove outdated files
 def cleanup_old_files():
-    """Remove files that are older than one hour."""
+    """Remove files that are older than one hour (cached results: idle longer than RESULT_CACHE_TTL)."""
     try:
         current_time = datetime.now().timestamp()
         max_age = 3600  # 1 hour
@@ -455,9 +1336,17 @@ def cleanup_old_files():
             filepath = os.path.join(UPLOAD_FOLDER, filename)
             if os.path.isfile(filepath):
                 file_age = current_time - os.path.getmtime(filepath)
-                if file_age > max_age:
+                if filename.startswith(RESULT_CACHE_PREFIX):
+                    if file_age > RESULT_CACHE_TTL:
+                        os.remove(filepath)
+                        evict_cached_result(filename[len(RESULT_CACHE_PREFIX):].split('.', 1)[0])
+                        print(f"[INFO] Expired cached result: {filename}")
+                elif file_age > max_age:
                     os.remove(filepath)
                     print(f"[INFO] Deleted old file: {filename}")
+                    # in-memory snapshot copies (job workers) stop matching once the source file is gone
+                    if not filename.endswith(SNAPSHOT_SUFFIX) and os.path.exists(_snapshot_path(filepath)):
+                        os.remove(_snapshot_path(filepath))
     except Exception as e:
         print(f"[WARN] Cleanup error: {str(e)}")
 
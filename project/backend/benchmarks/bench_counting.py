@@ -0,0 +1,40 @@
+"""
+Compare the support counting engines of flexible_basket.apriori on synthetic data.
+
+    cd project/backend
+    python -m benchmarks.bench_counting --transactions 20000 --min_support 0.002
+"""
+import argparse
+import time
+
+from data_processors import flexible_basket as fb
+from benchmarks.synthetic import make_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--avg_len", type=float, default=4.0)
+    parser.add_argument("--min_support", type=float, default=0.002)
+    parser.add_argument("--counters", default="python,bitmap")
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.transactions, args.items, args.avg_len)
+    print(f"{len(transactions):,} transactions, {args.items} items, min_support={args.min_support}")
+
+    reference = None
+    for name in args.counters.split(","):
+        start = time.perf_counter()
+        freqs = fb.apriori(transactions, min_support=args.min_support, counter=name)
+        elapsed = time.perf_counter() - start
+        n_itemsets = sum(len(level) for level in freqs.values())
+        print(f"  {name:<8} {elapsed:8.3f}s  levels={max(freqs)}  itemsets={n_itemsets:,}")
+        if reference is None:
+            reference = freqs
+        elif freqs != reference:
+            raise SystemExit(f"[ERROR] {name} disagrees with {args.counters.split(',')[0]}")
+
+
+if __name__ == "__main__":
+    main()
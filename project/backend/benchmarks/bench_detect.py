@@ -0,0 +1,59 @@
+"""
+Time detect_columns on a wide export without item-like column names (the cardinality fallback):
+the previous full-frame nunique() scan against the sampled HyperLogLog estimate, then a repeat call
+served from the header-signature cache.
+
+    cd project/backend
+    python -m benchmarks.bench_detect --rows 3000000 --columns 40
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processors import flexible_basket as fb
+
+
+def make_wide_df(n_rows, n_columns, n_products=3000, seed=0):
+    """Object columns with few distinct codes plus one high-cardinality product column under an unhelpful name."""
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"code_{i:02d}" for i in range(50)], dtype=object)
+    columns = {f"attr_{i:02d}": codes[rng.integers(0, len(codes), n_rows)] for i in range(n_columns - 1)}
+    products = np.array([f"สินค้า {i:05d}" for i in range(n_products)], dtype=object)
+    columns["desc_zz"] = products[rng.integers(0, n_products, n_rows)]
+    return pd.DataFrame(columns, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--columns", type=int, default=40)
+    args = parser.parse_args()
+
+    df = make_wide_df(args.rows, args.columns)
+
+    start = time.perf_counter()
+    str_cols = [c for c in df.columns if df[c].dtype == "object"]
+    full_scan = max(str_cols, key=lambda c: df[c].nunique(dropna=True))
+    t_full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dr = fb.detect_columns(df)
+    t_sampled = time.perf_counter() - start
+    if dr.item_col != full_scan:
+        raise SystemExit(f"[ERROR] sampled detection picked {dr.item_col!r}, full scan {full_scan!r}")
+
+    start = time.perf_counter()
+    cached = fb.detect_columns(df)
+    t_cached = time.perf_counter() - start
+
+    estimate = dr.detection["distinct_estimates"][str(full_scan)]
+    print(f"  rows={args.rows:,} columns={args.columns}  item={dr.item_col!r} (~{estimate:,} distinct"
+          f" in {dr.detection['sample_rows']:,} sampled rows)")
+    print(f"  nunique scan={t_full:7.3f}s  sampled HLL={t_sampled:7.3f}s ({t_full / max(t_sampled, 1e-9):.1f}x)"
+          f"  cached={t_cached * 1000:7.3f}ms (cached={cached.detection['cached']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Time IncrementalBasketModel.update for one new batch of orders against re-mining the whole history,
+and check the incremental results equal the full recompute (rules and frequent itemsets).
+
+    cd project/backend
+    python -m benchmarks.bench_incremental --rows 500000 --batches 30 --min_support 0.002
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processors import flexible_basket as fb
+from data_processors.incremental import IncrementalBasketModel
+from benchmarks.synthetic import make_long_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--avg_len", type=float, default=4.0)
+    parser.add_argument("--batches", type=int, default=30, help="split the orders into this many consecutive days")
+    parser.add_argument("--min_support", type=float, default=0.002)
+    parser.add_argument("--min_lift", type=float, default=1.0)
+    parser.add_argument("--check_every", type=int, default=10, help="compare with a full recompute every N batches")
+    args = parser.parse_args()
+
+    df = make_long_df(args.rows, args.items, args.avg_len).rename(
+        columns={"order_id": "Order ID", "product_name": "Product Name"})
+    # make_long_df sorts by order, so contiguous row ranges are disjoint sets of orders
+    bounds = np.linspace(0, len(df), args.batches + 1).astype(int)
+    order_ids = df["Order ID"].to_numpy()
+    for i in range(1, len(bounds) - 1):
+        while 0 < bounds[i] < len(df) and order_ids[bounds[i]] == order_ids[bounds[i] - 1]:
+            bounds[i] += 1
+    batches = [df.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+    model = IncrementalBasketModel(min_support=args.min_support, min_lift=args.min_lift)
+    for i, batch in enumerate(batches, 1):
+        start = time.perf_counter()
+        stats = model.update(batch)
+        rules_df, fi_df, meta = model.results()
+        t_inc = time.perf_counter() - start
+        line = (f"  batch {i:>3}  transactions={meta['n_transactions']:>9,}  tracked={stats['tracked_itemsets']:>7,}"
+                f"  rescanned={stats['rescanned_itemsets']:>5,}  update+results={t_inc:7.3f}s")
+        if i % args.check_every == 0 or i == len(batches):
+            start = time.perf_counter()
+            full_rules, full_fi, _ = fb.analyze_dataframe(pd.concat(batches[:i]), min_support=args.min_support,
+                                                          min_lift=args.min_lift, algorithm="apriori")
+            t_full = time.perf_counter() - start
+            if not (rules_df.equals(full_rules) and fi_df.equals(full_fi)):
+                raise SystemExit(f"[ERROR] batch {i}: incremental results differ from the full recompute")
+            line += f"  full={t_full:7.3f}s  ({t_full / max(t_inc, 1e-9):.1f}x)  rules={len(rules_df):,}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Time list-format transaction building (one row per order, "milk, bread; eggs" cells): the previous
+split + per-row strip lambda + whole-frame explode against tokenize_list_column, which only touches the
+order and items columns. Fails if the baskets differ.
+
+    cd project/backend
+    python -m benchmarks.bench_list_format --orders 1000000
+"""
+import argparse
+import dataclasses
+import time
+
+import numpy as np
+
+from data_processors import flexible_basket as fb
+from benchmarks.synthetic import make_list_df
+
+
+def explode_transactions(df, dr):
+    """The previous list-mode path of build_transactions, kept as the baseline (missing cells give no items)."""
+    split = (
+        df[dr.list_col]
+        .fillna("")
+        .astype(str)
+        .str.split(r"[,\|;]+", expand=False)
+        .apply(lambda lst: [x.strip() for x in lst if str(x).strip() != ""] if isinstance(lst, list) else [])
+    )
+    out = df.copy()
+    out[dr.list_col] = split
+    out = out.explode(dr.list_col).rename(columns={dr.list_col: "__item__"})
+    out = out[out["__item__"].notna() & (out["__item__"].astype(str).str.strip() != "")]
+    return fb.build_transactions(out, dataclasses.replace(dr, item_col="__item__", used_list_mode=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", default="1000000")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--avg_len", type=float, default=4.0)
+    args = parser.parse_args()
+
+    for n_orders in (int(x) for x in args.orders.split(",")):
+        df = make_list_df(n_orders, args.items, args.avg_len)
+        dr = fb.detect_columns(df)
+        if not dr.used_list_mode:
+            raise SystemExit(f"[ERROR] list format not detected: {dr}")
+
+        start = time.perf_counter()
+        baskets = fb.build_basket_matrix(*fb.build_transactions(df, dr))
+        t_new = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = fb.build_basket_matrix(*explode_transactions(df, dr))
+        t_old = time.perf_counter() - start
+        if not (np.array_equal(baskets.indptr, expected.indptr) and np.array_equal(baskets.indices, expected.indices)
+                and baskets.items.names == expected.items.names):
+            raise SystemExit("[ERROR] tokenized baskets differ from the explode baseline")
+        print(f"  orders={n_orders:>9,}  item entries={len(baskets.indices):>10,}  tokenizer={t_new:7.3f}s"
+              f"  explode={t_old:7.3f}s  ({t_old / max(t_new, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Compare the frequent itemset miners (apriori vs fpgrowth) on synthetic data.
+Fails if they disagree on any itemset or support.
+
+    cd project/backend
+    python -m benchmarks.bench_miners --transactions 20000 --min_support 0.001
+"""
+import argparse
+import time
+
+from data_processors import flexible_basket as fb
+from benchmarks.synthetic import make_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--avg_len", type=float, default=4.0)
+    parser.add_argument("--min_support", type=float, default=0.001)
+    parser.add_argument("--algorithms", default="apriori,fpgrowth")
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.transactions, args.items, args.avg_len)
+    print(f"{len(transactions):,} transactions, {args.items} items, min_support={args.min_support}")
+
+    names = args.algorithms.split(",")
+    reference = None
+    for name in names:
+        start = time.perf_counter()
+        freqs = fb.MINERS[name](transactions, min_support=args.min_support)
+        elapsed = time.perf_counter() - start
+        n_itemsets = sum(len(level) for level in freqs.values())
+        print(f"  {name:<9} {elapsed:8.3f}s  levels={max(freqs)}  itemsets={n_itemsets:,}")
+        if reference is None:
+            reference = freqs
+        elif freqs != reference:
+            raise SystemExit(f"[ERROR] {name} disagrees with {names[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Scaling of Apriori support counting with the number of worker processes (ParallelSupportCounter).
+workers=1 is the serial bitmap engine; every other run must find exactly the same itemsets.
+
+    cd project/backend
+    python -m benchmarks.bench_parallel --rows 2000000 --workers 1,2,4,8
+"""
+import argparse
+import os
+import time
+
+from data_processors import flexible_basket as fb
+from benchmarks.synthetic import make_long_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--avg_len", type=float, default=6.0)
+    parser.add_argument("--min_support", type=float, default=0.001)
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+
+    df = make_long_df(args.rows, args.items, args.avg_len)
+    long_df, item_col, trans_col = fb.build_transactions(df, fb.detect_columns(df))
+    baskets = fb.build_basket_matrix(long_df, item_col, trans_col)
+    print(f"{len(baskets):,} transactions, {baskets.n_items} items, min_support={args.min_support},"
+          f" {os.cpu_count()} CPUs")
+
+    reference, base = None, None
+    for workers in (int(x) for x in args.workers.split(",")):
+        start = time.perf_counter()
+        freqs = fb.apriori(baskets, min_support=args.min_support, workers=workers)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        n_itemsets = sum(len(level) for level in freqs.values())
+        print(f"  workers={workers:<3} {elapsed:8.3f}s  speedup={base / elapsed:5.2f}x  levels={max(freqs)}"
+              f"  itemsets={n_itemsets:,}")
+        if reference is None:
+            reference = freqs
+        elif freqs != reference:
+            raise SystemExit(f"[ERROR] workers={workers} disagrees with workers=1")
+
+
+if __name__ == "__main__":
+    main()
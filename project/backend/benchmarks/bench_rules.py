@@ -0,0 +1,65 @@
+"""
+Time rule generation from a fixed set of frequent itemsets, with peak memory from tracemalloc:
+- full generate_rules (mine all, then sort) against the top-K mode
+- min_confidence pruning while consequents grow against filtering the full rule list afterwards
+Fails if either mode disagrees with the full list.
+
+    cd project/backend
+    python -m benchmarks.bench_rules --transactions 5000 --items 40 --avg_len 10 --top_k 500 --min_confidence 0.3,0.6,0.9
+"""
+import argparse
+import time
+import tracemalloc
+
+from data_processors import flexible_basket as fb
+from benchmarks.synthetic import make_transactions
+
+
+def timed(fn, *args, **kwargs):
+    """(result, seconds, peak bytes); memory is traced in a second run so it does not skew the timing."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=40)
+    parser.add_argument("--avg_len", type=float, default=10.0)
+    parser.add_argument("--min_support", type=float, default=0.002)
+    parser.add_argument("--top_k", type=int, default=500)
+    parser.add_argument("--by", default="lift,confidence,support")
+    parser.add_argument("--min_confidence", default="0.3,0.6,0.9")
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.transactions, args.items, args.avg_len)
+    frequents = fb.fpgrowth(transactions, min_support=args.min_support)
+    n_itemsets = sum(len(level) for level in frequents.values())
+    print(f"  frequent itemsets={n_itemsets:,}  (min_support={args.min_support})")
+
+    for by in args.by.split(","):
+        full, t_full, m_full = timed(fb.generate_rules, frequents, by=by)
+        top, t_top, m_top = timed(fb.generate_rules, frequents, top_k=args.top_k, by=by)
+        if top != full[:args.top_k]:
+            raise SystemExit(f"[ERROR] top-{args.top_k} by {by} differs from the full rule list")
+        print(f"  by={by:<10}  rules={len(full):>9,}  full={t_full:7.3f}s {m_full / 2**20:7.1f}MiB"
+              f"  top_{args.top_k}={t_top:7.3f}s {m_top / 2**20:7.1f}MiB  ({t_full / max(t_top, 1e-9):.1f}x)")
+
+    full, t_full, m_full = timed(fb.generate_rules, frequents)
+    for min_confidence in (float(x) for x in args.min_confidence.split(",")):
+        pruned, t_pruned, m_pruned = timed(fb.generate_rules, frequents, min_confidence=min_confidence)
+        if pruned != [r for r in full if r["confidence"] >= min_confidence]:
+            raise SystemExit(f"[ERROR] min_confidence={min_confidence} differs from filtering the full rule list")
+        print(f"  min_confidence={min_confidence:<4}  rules={len(pruned):>9,}  filter_after={t_full:7.3f}s"
+              f" {m_full / 2**20:7.1f}MiB  pruned={t_pruned:7.3f}s {m_pruned / 2**20:7.1f}MiB"
+              f"  ({t_full / max(t_pruned, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
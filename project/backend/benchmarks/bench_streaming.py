@@ -0,0 +1,65 @@
+"""
+Streaming CSV ingestion (stream_csv_baskets) against the in-memory path (read_csv + build_transactions +
+build_basket_matrix) for each transaction id layout, at chunk sizes that do not line up with anything
+(row groups of 5, orders). Fails if the streamed baskets differ.
+
+    cd project/backend
+    python -m benchmarks.bench_streaming --rows 200000 --chunksize 777,20011
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processors import flexible_basket as fb
+from benchmarks.synthetic import make_customer_day_df, make_list_df, make_long_df
+
+
+def make_layout(layout, n_rows, n_items):
+    if layout == "order":
+        return make_long_df(n_rows, n_items)
+    if layout == "customer_day":
+        return make_customer_day_df(n_rows, n_items)
+    if layout == "rowgroup":
+        # no order / customer / date column: transactions are groups of 5 rows
+        return make_long_df(n_rows, n_items)[["product_name"]]
+    return make_list_df(max(1, n_rows // 4), n_items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--chunksize", default="777,20011")
+    parser.add_argument("--layouts", default="order,customer_day,rowgroup,list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in args.layouts.split(","):
+            path = os.path.join(tmp, f"{layout}.csv")
+            make_layout(layout, args.rows, args.items).to_csv(path, index=False)
+
+            start = time.perf_counter()
+            df = pd.read_csv(path, dtype=str)
+            dr = fb.detect_columns(df)
+            expected = fb.build_basket_matrix(*fb.build_transactions(df, dr))
+            t_memory = time.perf_counter() - start
+
+            for chunksize in (int(x) for x in args.chunksize.split(",")):
+                start = time.perf_counter()
+                baskets = fb.stream_csv_baskets(path, chunksize=chunksize)[0]
+                t_stream = time.perf_counter() - start
+                if not (np.array_equal(baskets.indptr, expected.indptr)
+                        and np.array_equal(baskets.indices, expected.indices)
+                        and baskets.items.names == expected.items.names):
+                    raise SystemExit(f"[ERROR] {layout}: streamed baskets (chunksize={chunksize}) differ from"
+                                     f" the in-memory ones")
+                print(f"  {layout:<12}  chunksize={chunksize:>7,}  transactions={len(baskets):>9,}"
+                      f"  in-memory={t_memory:7.3f}s  streamed={t_stream:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Reproducible end-to-end benchmark: seeded IBM Quest-style data (benchmarks.synthetic.make_quest_df) in the
+long and list layouts, timing each stage of the pipeline and writing the timings as JSON so runs on two
+commits can be diffed (--compare prints the ratio of every stage against an earlier run).
+
+Stages per layout: read_file (app.read_file_safely), stream_csv_baskets, build_baskets (detect_columns +
+build_transactions + build_basket_matrix), apriori, generate_rules, analyze_basket
+(BasketAnalyzer.analyze_basket), create_download_files, and through the Flask test client api_upload,
+api_process (cold: the result set and result cache entry are removed after each run) and api_process_cached.
+
+    cd project/backend
+    python -m benchmarks.bench_suite --orders 20000 --output bench.json
+    python -m benchmarks.bench_suite --orders 20000 --output bench_new.json --compare bench.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import QUEST_LENGTH_DISTRIBUTIONS, make_quest_df
+
+# Imported after the arguments are parsed (app reads JOB_BACKEND at import)
+app = fb = BasketAnalyzer = None
+
+
+def timed(fn, repeat):
+    """(last result, seconds of each of `repeat` runs)."""
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - start)
+    return result, seconds
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def wait_for_job(client, job_id, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").get_json()
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            if job["status"] != "succeeded":
+                raise SystemExit(f"[ERROR] job {job_id} {job['status']}: {job.get('error')}")
+            return job["result"]
+        time.sleep(0.02)
+    raise SystemExit(f"[ERROR] job {job_id} did not finish within {timeout}s")
+
+
+def remove_upload_files(names):
+    for name in names:
+        path = os.path.join(app.UPLOAD_FOLDER, name)
+        for candidate in (path, path + app.SNAPSHOT_SUFFIX):
+            if os.path.exists(candidate):
+                os.remove(candidate)
+
+
+def bench_layout(layout, args, client, record):
+    df = make_quest_df(layout, seed=args.seed, n_orders=args.orders, n_items=args.items, avg_len=args.avg_len,
+                       n_patterns=args.patterns, avg_pattern_len=args.pattern_len, skew=args.skew,
+                       length_dist=args.length_dist)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"quest_{layout}.csv")
+        df.to_csv(path, index=False)
+        file_bytes = os.path.getsize(path)
+        with open(path, "rb") as f:
+            payload = f.read()
+
+        read_df, seconds = timed(lambda: app.read_file_safely(path), args.repeat)
+        record("read_file", seconds, rows_out=len(read_df))
+        (baskets, _, _, _, _), seconds = timed(lambda: fb.stream_csv_baskets(path), args.repeat)
+        record("stream_csv_baskets", seconds, rows_out=len(baskets))
+
+    def build_baskets():
+        dr = fb.detect_columns(read_df)
+        return fb.build_basket_matrix(*fb.build_transactions(read_df, dr))
+
+    baskets, seconds = timed(build_baskets, args.repeat)
+    record("build_baskets", seconds, rows_in=len(read_df), rows_out=len(baskets), items=baskets.n_items)
+    freqs, seconds = timed(lambda: fb.apriori(baskets, min_support=args.min_support), args.repeat)
+    record("apriori", seconds, rows_out=sum(len(level) for level in freqs.values()), levels=max(freqs))
+    rules, seconds = timed(lambda: fb.generate_rules(freqs), args.repeat)
+    record("generate_rules", seconds, rows_out=len(rules))
+
+    analyzer = BasketAnalyzer(min_support=args.min_support)
+    results, seconds = timed(lambda: analyzer.analyze_basket(read_df, read_df), args.repeat)
+    if not results.get("success"):
+        raise SystemExit(f"[ERROR] analyze_basket failed: {results.get('error')}")
+    record("analyze_basket", seconds, rows_out=results["totalRules"],
+           spans=[{k: s[k] for k in ("name", "duration_ms") if k in s} for s in results["analysis"].get("spans", [])])
+
+    created = []
+
+    def export():
+        ok, files = app.create_download_files(results, f"quest_{layout}.csv")
+        if not ok:
+            raise SystemExit(f"[ERROR] create_download_files failed: {files}")
+        created.extend(files.values())
+        return files
+
+    _, seconds = timed(export, args.repeat)
+    record("create_download_files", seconds, rows_in=results["totalRules"])
+    remove_upload_files(created)
+
+    # End to end through the API; every run uploads a new file, so the snapshot/fingerprint are not reused
+    uploads, upload_seconds, cold_seconds, cached_seconds = [], [], [], []
+    for i in range(args.repeat):
+        start = time.perf_counter()
+        response = client.post("/api/upload", data={"file": (io.BytesIO(payload), f"quest_{layout}_{i}.csv")},
+                               content_type="multipart/form-data")
+        upload_seconds.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise SystemExit(f"[ERROR] upload failed: {response.get_json()}")
+        filename = response.get_json()["filename"]
+        uploads.append(filename)
+
+        request = {"filename": filename, "selectedColumns": []}
+        for seconds in (cold_seconds, cached_seconds):
+            start = time.perf_counter()
+            response = client.post("/api/process", json=request)
+            if response.status_code != 202:
+                raise SystemExit(f"[ERROR] /api/process failed: {response.get_json()}")
+            job = wait_for_job(client, response.get_json()["jobId"], args.timeout)
+            seconds.append(time.perf_counter() - start)
+        result_id = job["results"].get("resultId")
+        uploads += [f"{app.RESULT_SET_PREFIX}{result_id}.pkl", f"{app.RESULT_CACHE_PREFIX}{result_id}.json"]
+        remove_upload_files(uploads)
+    record("api_upload", upload_seconds, bytes_in=file_bytes)
+    record("api_process", cold_seconds, rows_out=job["results"].get("totalRules"))
+    record("api_process_cached", cached_seconds)
+    return {"rows": len(df), "orders": args.orders, "items": int(baskets.n_items),
+            "item_entries": int(len(baskets.indices)), "csv_bytes": file_bytes}
+
+
+# Arguments that do not change the data or the work done, so runs that differ only in these compare fine
+RUN_ONLY_ARGS = {"repeat", "timeout", "output", "compare", "job_backend", "layouts"}
+
+
+def compare(results, args, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        old_report = json.load(f)
+    baseline = {(r["layout"], r["stage"]): r for r in old_report["results"]}
+    old_args = old_report["meta"].get("args", {})
+    changed = sorted(k for k, v in vars(args).items() if k not in RUN_ONLY_ARGS and old_args.get(k) != v)
+    print(f"\ncompared with {baseline_path} (commit {old_report['meta'].get('commit')};"
+          f" median seconds, >1.00x = slower now)")
+    if changed:
+        print(f"[WARN] the runs used different data or parameters: {', '.join(changed)}")
+    for r in results:
+        old = baseline.get((r["layout"], r["stage"]))
+        if old is None:
+            continue
+        ratio = r["median"] / max(old["median"], 1e-9)
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        print(f"  {r['layout']:<5} {r['stage']:<22} {old['median']:9.4f}s -> {r['median']:9.4f}s  {ratio:5.2f}x{flag}")
+
+
+def main():
+    global app, fb, BasketAnalyzer
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--avg_len", type=float, default=6.0)
+    parser.add_argument("--patterns", type=int, default=2000)
+    parser.add_argument("--pattern_len", type=float, default=4.0)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--length_dist", choices=QUEST_LENGTH_DISTRIBUTIONS, default="poisson")
+    parser.add_argument("--layouts", default="long,list")
+    parser.add_argument("--min_support", type=float, default=0.001,
+                        help="support for the in-process stages (/api/process always mines at 0.001)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--job_backend", choices=("process", "thread"), default=None,
+                        help="JOB_BACKEND for the /api/process runs (default: the app's own setting)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for one /api/process job")
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--compare", default=None, help="earlier --output file to compare against")
+    args = parser.parse_args()
+
+    if args.job_backend:
+        os.environ["JOB_BACKEND"] = args.job_backend
+    import app as app_module
+    from data_processors import flexible_basket
+    from data_processors.basket_analyzer import BasketAnalyzer as analyzer_class
+    app, fb, BasketAnalyzer = app_module, flexible_basket, analyzer_class
+    client = app.app.test_client()
+
+    results, datasets = [], {}
+    for layout in args.layouts.split(","):
+        def record(stage, seconds, **extra):
+            results.append({"layout": layout, "stage": stage, "seconds": [round(s, 6) for s in seconds],
+                            "min": round(min(seconds), 6), "median": round(statistics.median(seconds), 6), **extra})
+            print(f"  {layout:<5} {stage:<22} median {statistics.median(seconds):9.4f}s  min {min(seconds):9.4f}s")
+        datasets[layout] = bench_layout(layout, args, client, record)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "createdAt": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "jobBackend": app.JOB_MANAGER.backend,
+            "args": vars(args),
+        },
+        "datasets": datasets,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[OK] Wrote {args.output}")
+    if args.compare:
+        compare(results, args, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Time the rules/itemsets -> JSON table conversion of BasketAnalyzer._build_output.
+Compares the previous iterrows() builder with the columnar one and checks the output is identical.
+
+    cd project/backend
+    python -m benchmarks.bench_tables --rules 100000,1000000
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processors.basket_analyzer import BasketAnalyzer
+
+
+def make_rules(n_rules, n_items=2000, seed=0):
+    """rules_df / fi_df shaped like fb.analyze_dataframe output, with ratio-style metrics."""
+    rng = np.random.default_rng(seed)
+    names = [f"สินค้า {i:05d}" for i in range(n_items)]
+    lengths = rng.integers(1, 4, size=(n_rules, 2))
+    codes = rng.integers(0, n_items, size=(n_rules, 6))
+    n_trans = 50_000
+    count_ab = rng.integers(50, 500, size=n_rules)
+    count_a = count_ab + rng.integers(0, 5000, size=n_rules)
+    count_b = count_ab + rng.integers(0, 5000, size=n_rules)
+    support = count_ab / n_trans
+    confidence = support / (count_a / n_trans)
+    lift = confidence / (count_b / n_trans)
+    rules_df = pd.DataFrame({
+        "antecedents": [tuple(names[c] for c in row[:k]) for row, k in zip(codes.tolist(), lengths[:, 0].tolist())],
+        "consequents": [tuple(names[c] for c in row[3:3 + k]) for row, k in zip(codes.tolist(), lengths[:, 1].tolist())],
+        "support": support,
+        "confidence": confidence,
+        "lift": lift,
+    }).sort_values(["lift", "confidence", "support"], ascending=False, ignore_index=True)
+    n_sets = max(1, n_rules // 4)
+    fi_df = pd.DataFrame({
+        "itemset": [tuple(names[c] for c in row[:k]) for row, k in
+                    zip(codes[:n_sets].tolist(), lengths[:n_sets, 0].tolist())],
+        "length": lengths[:n_sets, 0],
+        "support": support[:n_sets],
+    }).sort_values(["length", "support"], ascending=[True, False], ignore_index=True)
+    return rules_df, fi_df
+
+
+def iterrows_tables(rules_df, fi_df):
+    """The previous _build_output table code, kept as the baseline."""
+    def safe_num(x, ndigits=6):
+        try:
+            v = float(x)
+        except Exception:
+            return None
+        if (isinstance(v, float) and (math.isnan(v) or math.isinf(v))) or (
+            isinstance(x, (np.floating,)) and (np.isnan(x) or np.isinf(x))
+        ):
+            return None
+        try:
+            return round(v, ndigits)
+        except Exception:
+            return v
+
+    rulesTable = []
+    for i, row in rules_df.iterrows():
+        ant = ", ".join(list(row['antecedents'])) if isinstance(row['antecedents'], (list, tuple)) else str(row['antecedents'])
+        con = ", ".join(list(row['consequents'])) if isinstance(row['consequents'], (list, tuple)) else str(row['consequents'])
+        rulesTable.append({
+            "Antecedents": ant,
+            "Consequents": con,
+            "Support": safe_num(row.get("support", 0.0)),
+            "Confidence": safe_num(row.get("confidence", 0.0)),
+            "Lift": safe_num(row.get("lift", 0.0)),
+        })
+    frequentItemsetsTable = []
+    for i, row in fi_df.iterrows():
+        it = row.get("itemset")
+        items = ", ".join(list(it)) if isinstance(it, (list, tuple)) else str(it)
+        frequentItemsetsTable.append({
+            "Itemset": items,
+            "Length": int(row.get("length", 0)),
+            "Support": safe_num(row.get("support", 0.0))
+        })
+    return rulesTable, frequentItemsetsTable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", default="100000,1000000")
+    parser.add_argument("--baseline_max", type=int, default=1000000,
+                        help="skip the iterrows baseline above this many rules")
+    args = parser.parse_args()
+
+    analyzer = BasketAnalyzer()
+    meta = {"n_transactions": 50_000, "n_unique_items": 2000}
+    for n_rules in (int(x) for x in args.rules.split(",")):
+        rules_df, fi_df = make_rules(n_rules)
+
+        start = time.perf_counter()
+        output = analyzer._build_output(rules_df, fi_df, meta)
+        t_new = time.perf_counter() - start
+        line = f"  rules={n_rules:>9,}  itemsets={len(fi_df):>9,}  columnar={t_new:7.3f}s (incl. RuleIndex)"
+
+        if n_rules <= args.baseline_max:
+            start = time.perf_counter()
+            rules_table, fi_table = iterrows_tables(rules_df, fi_df)
+            t_old = time.perf_counter() - start
+            line += f"  iterrows={t_old:7.3f}s  ({t_old / max(t_new, 1e-9):.1f}x)"
+            if rules_table != output["rulesTable"] or fi_table != output["frequentItemsetsTable"]:
+                raise SystemExit("[ERROR] tables differ")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
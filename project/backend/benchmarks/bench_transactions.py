@@ -0,0 +1,94 @@
+"""
+Time transaction building alone: long DataFrame -> baskets.
+Compares the old per-order groupby/apply (list of sets of names) with build_basket_matrix (CSR of int codes).
+With --layout customer_day there is no order column: the integer customer/day transaction keys are compared
+with the previous string-concatenated "customer|date" keys, and the baskets must be identical.
+
+    cd project/backend
+    python -m benchmarks.bench_transactions --rows 100000,1000000,5000000 --baseline_max 1000000
+    python -m benchmarks.bench_transactions --layout customer_day --rows 1000000,3000000
+"""
+import argparse
+import dataclasses
+import time
+
+import numpy as np
+
+from data_processors import flexible_basket as fb
+from benchmarks.synthetic import make_customer_day_df, make_long_df
+
+
+def groupby_sets(long_df, item_col, trans_col):
+    """The previous analyze_dataframe path, kept as the baseline."""
+    return (
+        long_df.groupby(trans_col)[item_col]
+        .apply(lambda s: set([str(x) for x in s.values if str(x).strip() != ""]))
+        .tolist()
+    )
+
+
+def string_key_transactions(df, dr):
+    """The previous __customer_date__ construction (strings per row), kept as the baseline."""
+    working = df.copy()
+    c = fb.ensure_string_col(working, dr.customer_col)
+    d = fb.parse_date_maybe(fb.ensure_string_col(working, dr.date_col))
+    working["__customer_date__"] = c.fillna("") + "|" + d.fillna("")
+    return fb.build_transactions(working, dataclasses.replace(dr, order_col="__customer_date__"))
+
+
+def compare_keys(args):
+    for n_rows in (int(x) for x in args.rows.split(",")):
+        df = make_customer_day_df(n_rows, args.items)
+        dr = fb.detect_columns(df)
+
+        start = time.perf_counter()
+        baskets = fb.build_basket_matrix(*fb.build_transactions(df, dr))
+        t_int = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = fb.build_basket_matrix(*string_key_transactions(df, dr))
+        t_str = time.perf_counter() - start
+        if not (np.array_equal(baskets.indptr, expected.indptr) and np.array_equal(baskets.indices, expected.indices)):
+            raise SystemExit("[ERROR] integer-key baskets differ from the string-key baskets")
+        print(f"  rows={n_rows:>9,}  customer-days={len(baskets):>9,}  int keys={t_int:7.3f}s"
+              f"  string keys={t_str:7.3f}s  ({t_str / max(t_int, 1e-9):.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layout", choices=["order", "customer_day"], default="order")
+    parser.add_argument("--rows", default="100000,1000000,5000000")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--avg_len", type=float, default=4.0)
+    parser.add_argument("--baseline_max", type=int, default=1000000,
+                        help="skip the groupby/apply baseline above this many rows")
+    args = parser.parse_args()
+    if args.layout == "customer_day":
+        return compare_keys(args)
+
+    for n_rows in (int(x) for x in args.rows.split(",")):
+        df = make_long_df(n_rows, args.items, args.avg_len)
+        dr = fb.detect_columns(df)
+
+        start = time.perf_counter()
+        long_df, item_col, trans_col = fb.build_transactions(df, dr)
+        t_clean = time.perf_counter() - start
+
+        start = time.perf_counter()
+        baskets = fb.build_basket_matrix(long_df, item_col, trans_col)
+        t_csr = time.perf_counter() - start
+        line = (f"  rows={n_rows:>9,}  orders={len(baskets):>9,}  build_transactions={t_clean:7.3f}s"
+                f"  build_basket_matrix={t_csr:7.3f}s")
+
+        if n_rows <= args.baseline_max:
+            start = time.perf_counter()
+            sets = groupby_sets(long_df, item_col, trans_col)
+            t_old = time.perf_counter() - start
+            line += f"  groupby_apply={t_old:7.3f}s  ({t_old / max(t_csr, 1e-9):.0f}x)"
+            if len(sets) != len(baskets):
+                raise SystemExit("[ERROR] transaction counts differ")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Seeded synthetic basket data for the benchmark scripts.
+make_quest_baskets follows the IBM Quest generator (Agrawal & Srikant, 1994): baskets are filled from a pool
+of "potentially large" itemsets, so they contain real co-occurrence patterns rather than independent draws.
+"""
+from typing import List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def make_transactions(n_transactions: int = 20000,
+                      n_items: int = 500,
+                      avg_len: float = 4.0,
+                      skew: float = 1.1,
+                      seed: int = 42) -> List[Set[str]]:
+    """Poisson basket lengths, Zipf-like item popularity (a few best sellers, a long tail)."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n_items + 1) ** skew
+    weights /= weights.sum()
+    names = np.array([f"item_{i:05d}" for i in range(n_items)], dtype=object)
+    lengths = np.maximum(1, rng.poisson(avg_len, size=n_transactions))
+    draws = rng.choice(n_items, size=int(lengths.sum()), p=weights)
+    out = []
+    pos = 0
+    for length in lengths:
+        out.append(set(names[draws[pos:pos + length]].tolist()))
+        pos += length
+    return out
+
+
+def make_long_df(n_rows: int = 100000,
+                 n_items: int = 2000,
+                 avg_len: float = 4.0,
+                 skew: float = 1.1,
+                 seed: int = 42) -> pd.DataFrame:
+    """Long format (one row per order line) with string order ids and product names, built without Python loops."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n_items + 1) ** skew
+    weights /= weights.sum()
+    n_orders = max(1, int(n_rows / avg_len))
+    order_codes = np.sort(rng.integers(0, n_orders, size=n_rows))
+    item_codes = rng.choice(n_items, size=n_rows, p=weights)
+    return pd.DataFrame({
+        "order_id": pd.Categorical.from_codes(order_codes, [f"INV{i:08d}" for i in range(n_orders)]).astype(str),
+        "product_name": pd.Categorical.from_codes(item_codes, [f"สินค้า {i:05d}" for i in range(n_items)]).astype(str),
+    })
+
+
+def make_customer_day_df(n_rows: int = 100000,
+                         n_items: int = 2000,
+                         n_customers: int = 20000,
+                         n_days: int = 365,
+                         skew: float = 1.1,
+                         seed: int = 42) -> pd.DataFrame:
+    """Long format without an order column: member id + purchase timestamp text + product, so baskets are customer-days."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n_items + 1) ** skew
+    weights /= weights.sum()
+    stamps = (pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, n_days * 86400, size=n_rows), unit="s"))
+    return pd.DataFrame({
+        "member": pd.Categorical.from_codes(rng.integers(0, n_customers, size=n_rows),
+                                            [f"M{i:07d}" for i in range(n_customers)]).astype(str),
+        "date": stamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "product_name": pd.Categorical.from_codes(rng.choice(n_items, size=n_rows, p=weights),
+                                                  [f"สินค้า {i:05d}" for i in range(n_items)]).astype(str),
+    })
+
+
+def make_list_df(n_orders: int = 100000,
+                 n_items: int = 2000,
+                 avg_len: float = 4.0,
+                 skew: float = 1.1,
+                 seed: int = 42) -> pd.DataFrame:
+    """List format (one row per order, items joined like "milk, bread; eggs") plus unrelated columns."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n_items + 1) ** skew
+    weights /= weights.sum()
+    names = np.array([f"สินค้า {i:05d}" for i in range(n_items)], dtype=object)
+    lengths = np.maximum(1, rng.poisson(avg_len, size=n_orders))
+    tokens = names[rng.choice(n_items, size=int(lengths.sum()), p=weights)]
+    separators = np.array([", ", ",", "; ", " | "], dtype=object)[rng.integers(0, 4, size=len(tokens))]
+    ends = np.cumsum(lengths)
+    separators[ends - 1] = ""
+    pieces = (tokens + separators).tolist()
+    cells = ["".join(pieces[end - length:end]) for end, length in zip(ends.tolist(), lengths.tolist())]
+    return pd.DataFrame({
+        "order_id": [f"INV{i:08d}" for i in range(n_orders)],
+        "customer_name": pd.Categorical.from_codes(rng.integers(0, 5000, size=n_orders),
+                                                   [f"ลูกค้า {i:04d}" for i in range(5000)]).astype(str),
+        "total": rng.gamma(2.0, 150.0, size=n_orders).round(2),
+        "items": cells,
+        "note": "",
+    })
+
+
+QUEST_LENGTH_DISTRIBUTIONS = ("poisson", "geometric")
+
+
+def make_quest_baskets(n_orders: int = 20000,
+                       n_items: int = 1000,
+                       avg_len: float = 10.0,
+                       n_patterns: int = 2000,
+                       avg_pattern_len: float = 4.0,
+                       correlation: float = 0.5,
+                       corruption: float = 0.5,
+                       skew: float = 1.0,
+                       length_dist: str = "poisson",
+                       seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    IBM Quest-style baskets as CSR arrays (indptr, item codes; codes sorted within each basket).
+    - n_patterns potentially large itemsets of Poisson(avg_pattern_len) items; each shares an exponentially
+      distributed fraction (mean `correlation`) of its items with the previous one, the rest are drawn with
+      Zipf-like popularity (`skew`; 0 = uniform)
+    - pattern weights are exponential; each pattern has a corruption level ~ N(`corruption`, 0.1), the
+      chance that each of its items is left out when the pattern is put into a basket
+    - basket sizes follow `length_dist` ("poisson" or the longer-tailed "geometric") with mean avg_len;
+      patterns are added until the size is reached, an overflowing pattern goes in half of the time
+    """
+    if length_dist not in QUEST_LENGTH_DISTRIBUTIONS:
+        raise ValueError(f"Unknown length distribution: {length_dist!r} (expected one of {QUEST_LENGTH_DISTRIBUTIONS})")
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_items + 1) ** skew
+    popularity /= popularity.sum()
+
+    patterns = []
+    previous = np.zeros(0, dtype=np.int64)
+    for size in np.maximum(1, rng.poisson(avg_pattern_len, size=n_patterns)).tolist():
+        n_shared = min(len(previous), int(round(min(1.0, rng.exponential(correlation)) * size)))
+        shared = rng.choice(previous, size=n_shared, replace=False)
+        fresh = rng.choice(n_items, size=size - n_shared, p=popularity)
+        previous = np.unique(np.concatenate([shared, fresh]))
+        patterns.append(previous.tolist())
+    weights = rng.exponential(1.0, size=n_patterns)
+    weights /= weights.sum()
+    keep_chance = 1.0 - np.clip(rng.normal(corruption, 0.1, size=n_patterns), 0.0, 1.0)
+
+    if length_dist == "poisson":
+        lengths = np.maximum(1, rng.poisson(avg_len, size=n_orders))
+    else:
+        lengths = rng.geometric(1.0 / max(avg_len, 1.0), size=n_orders)
+    # keep baskets fillable from the catalog
+    lengths = np.minimum(lengths, max(1, n_items // 2))
+
+    def pattern_stream(block: int = 65536):
+        while True:
+            picks = rng.choice(n_patterns, size=block, p=weights)
+            coins = rng.random(size=block)
+            for pick, coin in zip(picks.tolist(), coins.tolist()):
+                yield pick, coin
+
+    stream = pattern_stream()
+    indptr = np.zeros(n_orders + 1, dtype=np.int64)
+    codes: List[int] = []
+    for t, length in enumerate(lengths.tolist()):
+        basket: Set[int] = set()
+        while len(basket) < length:
+            pick, coin = next(stream)
+            items = [i for i, u in zip(patterns[pick], rng.random(len(patterns[pick])).tolist())
+                     if u < keep_chance[pick]]
+            if basket and len(basket | set(items)) > length and coin < 0.5:
+                break
+            basket.update(items)
+        codes.extend(sorted(basket))
+        indptr[t + 1] = len(codes)
+    return indptr, np.array(codes, dtype=np.int32)
+
+
+def make_quest_df(layout: str = "long", seed: int = 42, **quest) -> pd.DataFrame:
+    """
+    make_quest_baskets(seed=seed, **quest) as an upload-like DataFrame: "long" has one row per order line
+    (order_id, product_name, qty), "list" one row per order with the items joined by ", " (order_id, items).
+    """
+    indptr, codes = make_quest_baskets(seed=seed, **quest)
+    n_orders = len(indptr) - 1
+    n_items = int(quest.get("n_items", 1000))
+    names = np.array([f"สินค้า {i:05d}" for i in range(n_items)], dtype=object)
+    order_ids = np.array([f"INV{i:08d}" for i in range(n_orders)], dtype=object)
+    if layout == "long":
+        rng = np.random.default_rng(seed + 1)
+        return pd.DataFrame({
+            "order_id": order_ids[np.repeat(np.arange(n_orders), np.diff(indptr))],
+            "product_name": names[codes],
+            "qty": rng.integers(1, 6, size=len(codes)),
+        })
+    if layout == "list":
+        tokens = names[codes].tolist()
+        return pd.DataFrame({
+            "order_id": order_ids,
+            "items": [", ".join(tokens[start:end]) for start, end in zip(indptr[:-1].tolist(), indptr[1:].tolist())],
+        })
+    raise ValueError(f"Unknown layout: {layout!r} (expected 'long' or 'list')")
@@ -2,17 +2,53 @@
 """
 Basket analyzer (flex version): wraps flexible_basket to keep the same API that app.py expects.
 - Auto-detects columns for item/order/customer/date (+list-mode via items/tags/categories)
+- Apriori or FP-Growth miner via BasketAnalyzer(algorithm=...), Apriori optionally on several cores (workers=...)
+- Stage timings: with tracing enabled, output["analysis"]["spans"] lists the spans of the analysis (see tracing)
 - No mlxtend dependency
 """
+from typing import Optional
+
 import pandas as pd
-import math
-import numpy as np
 from . import flexible_basket as fb
+from . import tracing
+from .rule_index import RULE_COLUMNS, RuleIndex, json_floats
+
+
+def _join_items(values) -> list:
+    # pretty print tuples
+    return [", ".join(v) if isinstance(v, (list, tuple)) else str(v) for v in values]
+
+
+def _records(keys, columns) -> list:
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
 
 class BasketAnalyzer:
-    def __init__(self, min_support: float = 0.001, min_lift: float = 1.0):
+    def __init__(self, min_support: float = 0.001, min_lift: float = 1.0, algorithm: str = "apriori",
+                 top_k: Optional[int] = None, top_by: str = "lift", min_confidence: float = 0.0,
+                 workers: int = 1):
+        """
+        `top_k` keeps only the best rules by `top_by` ("lift", "confidence" or "support");
+        `min_confidence` drops weaker rules while they are generated.
+        `workers` > 1 counts Apriori supports on that many processes.
+        """
+        if algorithm not in fb.MINERS:
+            raise ValueError(f"Unknown algorithm: {algorithm!r} (expected one of {sorted(fb.MINERS)})")
+        if top_by not in fb.RULE_SORT_KEYS:
+            raise ValueError(f"Unknown rule ranking: {top_by!r} (expected one of {sorted(fb.RULE_SORT_KEYS)})")
+        if top_k is not None and int(top_k) < 1:
+            raise ValueError("top_k must be a positive integer")
+        if not 0.0 <= float(min_confidence) <= 1.0:
+            raise ValueError("min_confidence must be between 0 and 1")
         self.min_support = float(min_support)
         self.min_lift = float(min_lift)
+        self.algorithm = algorithm
+        self.top_k = int(top_k) if top_k is not None else None
+        self.top_by = top_by
+        self.min_confidence = float(min_confidence)
+        self.workers = max(1, int(workers))
+        # RuleIndex of the last analysis (kept server-side for paging; not part of the JSON output)
+        self.rule_index = None
 
     def analyze_basket(self, selected_df: pd.DataFrame, original_df: pd.DataFrame):
         """
@@ -27,108 +63,141 @@ class BasketAnalyzer:
                 return {'success': False, 'error': 'Empty dataframe', 'type': 'basket'}
 
             # Run analysis
-            rules_df, fi_df, meta = fb.analyze_dataframe(
-                df,
-                min_support=self.min_support,
-                min_lift=self.min_lift
-            )
-
-            # Helper to make numbers JSON-safe (no NaN/Infinity)
-            def safe_num(x, ndigits=6):
-                try:
-                    v = float(x)
-                except Exception:
-                    return None
-                # Treat NaN/inf as None to keep valid JSON
-                if (isinstance(v, float) and (math.isnan(v) or math.isinf(v))) or (
-                    isinstance(x, (np.floating,)) and (np.isnan(x) or np.isinf(x))
-                ):
-                    return None
-                try:
-                    return round(v, ndigits)
-                except Exception:
-                    return v
-
-            # Prepare tables for frontend/exporter
-            # Association Rules table
-            rulesTable = []
-            if not rules_df.empty:
-                for i, row in rules_df.iterrows():
-                    # pretty print tuples
-                    ant = ", ".join(list(row['antecedents'])) if isinstance(row['antecedents'], (list, tuple)) else str(row['antecedents'])
-                    con = ", ".join(list(row['consequents'])) if isinstance(row['consequents'], (list, tuple)) else str(row['consequents'])
-                    rulesTable.append({
-                        "Antecedents": ant,
-                        "Consequents": con,
-                        "Support": safe_num(row.get("support", 0.0)),
-                        "Confidence": safe_num(row.get("confidence", 0.0)),
-                        "Lift": safe_num(row.get("lift", 0.0)),
-                    })
-
-            # Frequent Itemsets table
-            frequentItemsetsTable = []
-            if not fi_df.empty:
-                for i, row in fi_df.iterrows():
-                    it = row.get("itemset")
-                    if isinstance(it, (list, tuple)):
-                        items = ", ".join(list(it))
-                    else:
-                        items = str(it)
-                    frequentItemsetsTable.append({
-                        "Itemset": items,
-                        "Length": int(row.get("length", 0)),
-                        "Support": safe_num(row.get("support", 0.0))
-                    })
-
-            # Single item "rules" (optional, for UI compatibility) => Top-20 items by support as 1→null
-            singleRulesTable = []
-            if not fi_df.empty:
-                single = fi_df[fi_df["length"]==1].head(20)
-                for i, row in single.iterrows():
-                    it = row.get("itemset")
-                    items = ", ".join(list(it)) if isinstance(it, (list, tuple)) else str(it)
-                    singleRulesTable.append({
-                        "Antecedents": items,
-                        "Consequents": "",
-                        "Support": round(float(row.get("support", 0.0)), 6),
-                        "Confidence": "",
-                        "Lift": "",
-                    })
-
-            # Totals for summary widgets/downloads
-            total_rules = len(rulesTable)
-            total_freq_itemsets = int(len(fi_df)) if isinstance(fi_df, pd.DataFrame) else 0
-            total_transactions = int(meta.get("n_transactions", 0))
-            total_items = int(meta.get("n_unique_items", 0))
-
-            output = {
-                "success": True,
-                "type": "basket",
-                "meta": {
-                    "detectedItemCol": meta.get("detected_item_col"),
-                    "detectedTransCol": meta.get("detected_trans_col"),
-                    "nTransactions": meta.get("n_transactions", 0),
-                    "nUniqueItems": meta.get("n_unique_items", 0),
-                    "heuristics": meta.get("heuristics", {}),
-                    "minSupport": self.min_support,
-                    "minLift": self.min_lift
-                },
-                # analysis metadata (used by UI label)
-                "analysis": {
-                    "method": "flex_apriori",
-                    "engine": "python",
-                    "library": "internal"
-                },
-                # top-level totals for UI summary
-                "totalRules": total_rules,
-                "totalTransactions": total_transactions,
-                "totalItems": total_items,
-                "totalFrequentItemsets": total_freq_itemsets,
-                "rulesTable": rulesTable,
-                "singleRulesTable": singleRulesTable,
-                "frequentItemsetsTable": frequentItemsetsTable
-            }
-            return output
+            with tracing.trace() as trace:
+                rules_df, fi_df, meta = fb.analyze_dataframe(
+                    df,
+                    min_support=self.min_support,
+                    min_lift=self.min_lift,
+                    algorithm=self.algorithm,
+                    top_k=self.top_k,
+                    by=self.top_by,
+                    min_confidence=self.min_confidence,
+                    workers=self.workers
+                )
+                return self._traced(self._build_output(rules_df, fi_df, meta), trace)
 
         except Exception as e:
             return {"success": False, "error": str(e), "type": "basket"}
+
+    def analyze_csv(self, path: str, usecols=None, chunksize: int = 200_000, sep: str = "auto", encoding=None):
+        """
+        Streaming variant of analyze_basket for large CSV files: the file is read in chunks of
+        `chunksize` rows and never materialized (see fb.stream_csv_baskets). Same output dict.
+        """
+        try:
+            if sep == "auto":
+                sep = fb.sniff_separator(path)
+            with tracing.trace() as trace:
+                rules_df, fi_df, meta = fb.analyze_csv_stream(
+                    path,
+                    min_support=self.min_support,
+                    min_lift=self.min_lift,
+                    algorithm=self.algorithm,
+                    chunksize=chunksize,
+                    sep=sep,
+                    encoding=encoding,
+                    usecols=usecols,
+                    top_k=self.top_k,
+                    by=self.top_by,
+                    min_confidence=self.min_confidence,
+                    workers=self.workers
+                )
+                return self._traced(self._build_output(rules_df, fi_df, meta), trace)
+
+        except Exception as e:
+            return {"success": False, "error": str(e), "type": "basket"}
+
+    @staticmethod
+    def _traced(output: dict, trace: tracing.Trace) -> dict:
+        # the list is shared with the trace, so spans recorded later by an enclosing trace show up too
+        if trace.enabled:
+            output["analysis"]["spans"] = trace.spans
+        return output
+
+    def _build_output(self, rules_df: pd.DataFrame, fi_df: pd.DataFrame, meta: dict):
+        """Turn the mined DataFrames into the result dict served to the frontend/exporter."""
+        with tracing.span("rule_index", rows_in=len(rules_df)):
+            self.rule_index = RuleIndex.from_rules(rules_df)
+        with tracing.span("build_tables", rows_in=len(rules_df) + len(fi_df)):
+            output = self._build_tables(rules_df, fi_df, meta)
+        self.rule_index.itemsets = output["frequentItemsetsTable"]
+        return output
+
+    def _build_tables(self, rules_df: pd.DataFrame, fi_df: pd.DataFrame, meta: dict):
+
+        # Tables are built column by column: joined item strings once per column, numbers rounded
+        # and NaN/inf-masked in NumPy (json_floats), then zipped into records
+        rulesTable = []
+        if not rules_df.empty:
+            rulesTable = _records(RULE_COLUMNS, (
+                _join_items(rules_df["antecedents"]),
+                _join_items(rules_df["consequents"]),
+                json_floats(rules_df["support"]),
+                json_floats(rules_df["confidence"]),
+                json_floats(rules_df["lift"]),
+            ))
+
+        # Frequent Itemsets table
+        frequentItemsetsTable = []
+        if not fi_df.empty:
+            frequentItemsetsTable = _records(("Itemset", "Length", "Support"), (
+                _join_items(fi_df["itemset"]),
+                fi_df["length"].astype(int).tolist(),
+                json_floats(fi_df["support"]),
+            ))
+
+        # Single item "rules" (optional, for UI compatibility) => Top-20 items by support as 1→null
+        singleRulesTable = []
+        if not fi_df.empty:
+            single = fi_df[fi_df["length"]==1].head(20)
+            n_single = len(single)
+            singleRulesTable = _records(RULE_COLUMNS, (
+                _join_items(single["itemset"]),
+                [""] * n_single,
+                [round(float(v), 6) for v in single["support"].tolist()],
+                [""] * n_single,
+                [""] * n_single,
+            ))
+
+        # Totals for summary widgets/downloads
+        total_rules = len(rulesTable)
+        total_freq_itemsets = int(len(fi_df)) if isinstance(fi_df, pd.DataFrame) else 0
+        total_transactions = int(meta.get("n_transactions", 0))
+        total_items = int(meta.get("n_unique_items", 0))
+
+        output = {
+            "success": True,
+            "type": "basket",
+            "meta": {
+                "detectedItemCol": meta.get("detected_item_col"),
+                "detectedTransCol": meta.get("detected_trans_col"),
+                "nTransactions": meta.get("n_transactions", 0),
+                "nUniqueItems": meta.get("n_unique_items", 0),
+                "heuristics": meta.get("heuristics", {}),
+                "detection": meta.get("detection", {}),
+                "minSupport": self.min_support,
+                "minLift": self.min_lift,
+                "minConfidence": self.min_confidence,
+                "algorithm": self.algorithm
+            },
+            # analysis metadata (used by UI label)
+            "analysis": {
+                "method": f"flex_{self.algorithm}",
+                "engine": "python",
+                "library": "internal"
+            },
+            # top-level totals for UI summary
+            "totalRules": total_rules,
+            "totalTransactions": total_transactions,
+            "totalItems": total_items,
+            "totalFrequentItemsets": total_freq_itemsets,
+            "rulesTable": rulesTable,
+            "singleRulesTable": singleRulesTable,
+            "frequentItemsetsTable": frequentItemsetsTable
+        }
+        if self.top_k is not None:
+            output["meta"]["topK"] = self.top_k
+            output["meta"]["topBy"] = self.top_by
+        if meta.get("streaming"):
+            output["meta"]["streaming"] = meta["streaming"]
+        return output
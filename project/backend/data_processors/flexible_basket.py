@@ -7,11 +7,13 @@ Key features
 - Reads CSV/Excel with unpredictable/unknown column names
 - Detects likely item / order / customer / date columns heuristically
 - Handles both "long" format (one row per item) and "list" format (one row per order with items separated by commas)
-- Implements a pure-Python Apriori + association rule miner (no mlxtend needed)
+- Implements pure-Python Apriori and FP-Growth miners + an association rule miner (no mlxtend needed)
 - Returns clean pandas DataFrames for frequent itemsets and rules
 
-Usage (CLI)
-    python flexibasket_cli.py --input yourfile.csv --min_support 0.001 --sep auto
+Usage (CLI, from project/backend)
+    python flexibasket_cli.py build yourfile.csv yourfile.basket --sep auto
+    python flexibasket_cli.py info yourfile.basket
+    python flexibasket_cli.py analyze yourfile.csv --store yourfile.basket --min_support 0.001
 
 Integration (Flask)
     from flexible_basket import analyze_file
@@ -25,14 +27,25 @@ from __future__ import annotations
 import os
 import json
 import math
+import heapq
+import operator
 import itertools
 import re
-from typing import Dict, List, Tuple, Optional, Set, Any
-from dataclasses import dataclass
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Tuple, Optional, Set, Any
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 
 import pandas as pd
 import numpy as np
 
+from .tracing import span
+
 # -----------------------------
 # Column detection heuristics
 # -----------------------------
@@ -62,22 +75,63 @@ NON_ALPHA_NUM = re.compile(r"[^a-z0-9]+")
 def norm(s: str) -> str:
     return NON_ALPHA_NUM.sub("", str(s).strip().lower())
 
-def guess_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
-    cols = list(df.columns)
-    norm_map = {col: norm(col) for col in cols}
-    cand_norms = set([norm(c) for c in candidates])
+@lru_cache(maxsize=None)
+def _candidate_norms(candidates: Tuple[str, ...]) -> frozenset:
+    return frozenset(norm(c) for c in candidates)
+
+def _guess_normalized(norm_cols: List[Tuple[Any, str]], candidates: List[str]) -> Optional[str]:
+    """guess_column over (column, norm(column)) pairs normalized once by the caller."""
+    cand_norms = _candidate_norms(tuple(candidates))
     # direct exact match first
-    for col in cols:
-        if norm_map[col] in cand_norms:
+    for col, n in norm_cols:
+        if n in cand_norms:
             return col
     # partial / contains match
-    for col in cols:
-        n = norm_map[col]
+    for col, n in norm_cols:
         for c in cand_norms:
             if c and (c in n or n in c):
                 return col
     return None
 
+def guess_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
+    return _guess_normalized([(col, norm(col)) for col in df.columns], candidates)
+
+HLL_PRECISION = 12
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Bit length of each uint64 (0 for 0), via exact float64 log2 of 32-bit halves."""
+    out = np.zeros(len(values), dtype=np.int64)
+    hi = (values >> np.uint64(32)).astype(np.float64)
+    lo = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    has_hi = hi > 0
+    has_lo = ~has_hi & (lo > 0)
+    out[has_hi] = 33 + np.floor(np.log2(hi[has_hi])).astype(np.int64)
+    out[has_lo] = 1 + np.floor(np.log2(lo[has_lo])).astype(np.int64)
+    return out
+
+def approx_distinct(values, precision: int = HLL_PRECISION) -> int:
+    """
+    HyperLogLog estimate of the number of distinct non-null values (about 1.04/sqrt(2**precision)
+    relative error, 1.6% at the default), from one vectorized hash pass and 2**precision registers.
+    """
+    s = pd.Series(values).dropna()
+    if s.empty:
+        return 0
+    h = pd.util.hash_array(s.to_numpy(dtype=object), categorize=False)
+    m = 1 << precision
+    register = (h >> np.uint64(64 - precision)).astype(np.int64)
+    # rank = position of the first set bit in the remaining 64 - precision bits
+    rest = h & np.uint64((1 << (64 - precision)) - 1)
+    rank = (64 - precision + 1) - _bit_length(rest)
+    registers = np.zeros(m, dtype=np.int64)
+    np.maximum.at(registers, register, rank)
+    estimate = (0.7213 / (1 + 1.079 / m)) * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        # small-range correction (linear counting)
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
 # ----------------------------------
 # Transaction building helpers
 # ----------------------------------
@@ -98,22 +152,48 @@ def parse_date_maybe(s: pd.Series) -> pd.Series:
     except Exception:
         return s
 
-def explode_list_column(df: pd.DataFrame, items_col: str) -> pd.DataFrame:
-    # split by comma/semicolon/| and explode
-    series = df[items_col]
+LIST_SEPARATORS = re.compile(r"[,\|;]+")
+
+def tokenize_list_column(series: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split list-format cells ("milk, bread; eggs") on runs of , | ; into stripped, non-empty tokens.
+    Returns (indptr, codes, names): the tokens of row r are names[codes[indptr[r]:indptr[r+1]]], in cell order,
+    with int32 codes into the sorted distinct token names. Missing cells have no tokens.
+    """
     if isinstance(series, pd.DataFrame):
         series = series.iloc[:, 0]
-    split = (
-        series
-        .astype(str)
-        .str.split(r"[,\|;]+", expand=False)
-        .apply(lambda lst: [x.strip() for x in lst if str(x).strip() != ""] if isinstance(lst, list) else [])
-    )
-    out = df.copy()
-    out[items_col] = split
-    out = out.explode(items_col).rename(columns={items_col: "__item__"})
-    out = out[out["__item__"].notna() & (out["__item__"].astype(str).str.strip() != "")]
-    return out
+    if not len(series):
+        return np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=object)
+    # mask before astype(str), which would turn NaN/None into "nan"/"None" tokens
+    missing = series.isna().to_numpy()
+    texts = series.astype(str).to_numpy(dtype=object)
+    if missing.any():
+        texts[missing] = ""
+    # every separator becomes "," so all cells (joined by NUL) split in one pass; runs of separators just
+    # leave empty tokens, which are dropped like the empty pieces of the per-row split
+    joined = "\x00".join(texts.tolist())
+    if joined.count("\x00") == len(texts) - 1:
+        joined = joined.replace("|", ",").replace(";", ",")
+        counts = np.fromiter((row.count(",") + 1 for row in joined.split("\x00")), dtype=np.int64, count=len(texts))
+        tokens = np.array([t.strip() for t in joined.replace("\x00", ",").split(",")], dtype=object)
+    else:
+        # a cell contains NUL itself: split row by row
+        split = [[t.strip() for t in LIST_SEPARATORS.split(text)] for text in texts.tolist()]
+        counts = np.fromiter((len(parts) for parts in split), dtype=np.int64, count=len(split))
+        tokens = np.array([t for parts in split for t in parts], dtype=object)
+    rows_of = np.repeat(np.arange(len(texts), dtype=np.int64), counts)
+    keep = tokens != ""
+    codes, names = pd.factorize(tokens[keep], sort=True)
+    indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows_of[keep], minlength=len(texts)), out=indptr[1:])
+    return indptr, codes.astype(np.int32, copy=False), np.asarray(names, dtype=object)
+
+def explode_list_column(df: pd.DataFrame, items_col: str) -> pd.DataFrame:
+    """One row per token of df[items_col] (renamed "__item__"); other columns are repeated."""
+    indptr, codes, names = tokenize_list_column(df[items_col])
+    out = df.iloc[np.repeat(np.arange(len(df)), np.diff(indptr))].copy()
+    out[items_col] = names[codes]
+    return out.rename(columns={items_col: "__item__"})
 
 @dataclass
 class DetectResult:
@@ -122,68 +202,213 @@ class DetectResult:
     customer_col: Optional[str]
     date_col: Optional[str]
     used_list_mode: bool
+    list_col: Optional[str] = None
+    # cost of the detection: seconds, whether it came from the header cache, rows sampled
+    detection: Dict[str, Any] = field(default_factory=dict)
+
+# Detection results per header signature (column names + dtypes), so repeat uploads with the same
+# layout skip detection; the cardinality fallback only looks at an evenly spaced row sample.
+DETECT_SAMPLE_ROWS = 20_000
+DETECT_CACHE_SIZE = 256
+_detect_cache: "OrderedDict[Tuple, DetectResult]" = OrderedDict()
+_detect_lock = threading.Lock()
+
+def _row_sample(series: pd.Series, n: int) -> pd.Series:
+    if len(series) <= n:
+        return series
+    return series.iloc[np.linspace(0, len(series) - 1, n).astype(np.int64)]
 
-def detect_columns(df: pd.DataFrame) -> DetectResult:
+def _detect_uncached(df: pd.DataFrame, sample_rows: int) -> DetectResult:
+    norm_cols = [(col, norm(col)) for col in df.columns]
     # Try list-format first (one row/order, items list in a single col)
-    list_col = guess_column(df, LIST_FORMAT_SYNONYMS)
-    item_col = guess_column(df, ITEM_SYNONYMS)
-    order_col = guess_column(df, ORDER_SYNONYMS)
-    cust_col  = guess_column(df, CUSTOMER_SYNONYMS)
-    date_col  = guess_column(df, DATE_SYNONYMS)
+    list_col = _guess_normalized(norm_cols, LIST_FORMAT_SYNONYMS)
+    item_col = _guess_normalized(norm_cols, ITEM_SYNONYMS)
+    order_col = _guess_normalized(norm_cols, ORDER_SYNONYMS)
+    cust_col  = _guess_normalized(norm_cols, CUSTOMER_SYNONYMS)
+    date_col  = _guess_normalized(norm_cols, DATE_SYNONYMS)
 
-    used_list_mode = False
     if list_col is not None and order_col is not None:
-        used_list_mode = True
-        return DetectResult(item_col="__item__", order_col=order_col, customer_col=cust_col, date_col=date_col, used_list_mode=True)
+        return DetectResult(item_col="__item__", order_col=order_col, customer_col=cust_col, date_col=date_col,
+                            used_list_mode=True, list_col=list_col)
 
     # If not list mode, we need an item column
+    detection: Dict[str, Any] = {}
     if item_col is None:
         # last resort: if a column has high cardinality and stringy, assume it's item
         str_cols = [c for c in df.columns if df[c].dtype == "object"]
         if len(str_cols) > 0:
-            cand = max(str_cols, key=lambda c: df[c].nunique(dropna=True))
-            item_col = cand
+            distinct = {c: approx_distinct(_row_sample(df[c], sample_rows)) for c in str_cols}
+            item_col = max(str_cols, key=distinct.__getitem__)
+            detection["sample_rows"] = min(len(df), sample_rows)
+            detection["distinct_estimates"] = {str(c): v for c, v in distinct.items()}
+
+    return DetectResult(item_col=item_col, order_col=order_col, customer_col=cust_col, date_col=date_col,
+                        used_list_mode=False, detection=detection)
+
+def detect_columns(df: pd.DataFrame, sample_rows: int = DETECT_SAMPLE_ROWS) -> DetectResult:
+    """
+    Guess the item / order / customer / date columns from the column names; without an item-like name,
+    the object column with the most distinct values (HyperLogLog estimate over `sample_rows` rows) wins.
+    Results are memoized per header signature; `detection` reports the cost of this call.
+    """
+    start = time.perf_counter()
+    signature = tuple(zip(df.columns, df.dtypes.astype(str)))
+    with _detect_lock:
+        cached = _detect_cache.get(signature)
+        if cached is not None:
+            _detect_cache.move_to_end(signature)
+    if cached is None:
+        dr = _detect_uncached(df, sample_rows)
+        with _detect_lock:
+            _detect_cache[signature] = dr
+            while len(_detect_cache) > DETECT_CACHE_SIZE:
+                _detect_cache.popitem(last=False)
+    else:
+        dr = cached
+    return replace(dr, detection={**dr.detection, "cached": cached is not None,
+                                  "seconds": round(time.perf_counter() - start, 6)})
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+@dataclass
+class TransactionKeyCodes:
+    """
+    Integer codes behind the synthetic transaction ids of build_transactions (customer + day, day).
+    Pass one instance for every chunk of a file so ids stay consistent across chunks; the date format
+    guessed on the first chunk is reused for the rest.
+    """
+    customers: Dict[str, int] = field(default_factory=dict)
+    days: Dict[Any, int] = field(default_factory=dict)
+    date_format: Optional[str] = None
+    date_format_known: bool = False
+
+def _source_series(df: pd.DataFrame, col: str) -> pd.Series:
+    s = df[col]
+    if isinstance(s, pd.DataFrame):
+        s = s.iloc[:, 0]
+    return s
+
+def _shared_codes(raw_codes: np.ndarray, values, table: Dict[Any, int]) -> np.ndarray:
+    """Per-row codes from per-row indexes into `values`, numbering each distinct value in the shared `table`."""
+    value_codes, distinct = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    distinct = list(distinct)
+    if not table:
+        table.update(zip(distinct, range(len(distinct))))
+        mapping = np.arange(len(distinct), dtype=np.int64)
+    else:
+        mapping = np.fromiter((table.setdefault(k, len(table)) for k in distinct), dtype=np.int64, count=len(distinct))
+    return mapping[value_codes][raw_codes]
+
+def _string_uniques(s: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+    """(per-row codes, ensure_string_col of the distinct raw values): strings are made once per distinct value."""
+    raw_codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    return raw_codes, pd.Series(uniques).astype(str).str.strip()
+
+def _customer_codes(s: pd.Series, keys: TransactionKeyCodes) -> np.ndarray:
+    """Codes of ensure_string_col(s) values."""
+    raw_codes, texts = _string_uniques(s)
+    return _shared_codes(raw_codes, texts, keys.customers)
+
+# strings pandas skips when inferring a datetime format from the first value
+_NOT_A_DATE = frozenset(["", "NaT", "nat", "NAT", "nan", "NaN", "NAN", "now", "today"])
+
+def _day_codes(s: pd.Series, keys: TransactionKeyCodes) -> np.ndarray:
+    """
+    Codes of the calendar day parse_date_maybe(ensure_string_col(s)) gives each row: the distinct strings are
+    parsed once, with the format pandas would infer from the first one passed explicitly (and kept in `keys`),
+    and grouped by day number (NaT -> int64 min) instead of a formatted date string.
+    Unparseable columns group by the raw text.
+    """
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        # already parsed: the day number comes straight from the datetime64 values
+        if s.dt.tz is not None:
+            s = s.dt.tz_localize(None)
+        return _shared_codes(np.arange(len(s)), s.to_numpy().astype("datetime64[D]").astype(np.int64), keys.days)
+
+    raw_codes, texts = _string_uniques(s)
+    try:
+        if not keys.date_format_known:
+            first = next((t for t in texts.dropna() if t not in _NOT_A_DATE), None)
+            keys.date_format = guess_datetime_format(first) if first is not None else None
+            keys.date_format_known = first is not None
+        parsed = pd.DatetimeIndex(pd.to_datetime(texts, errors="coerce", format=keys.date_format))
+        if parsed.tz is not None:
+            parsed = parsed.tz_localize(None)  # local wall-clock day, like .dt.date
+        day_keys = parsed.values.astype("datetime64[D]").astype(np.int64)
+    except Exception:
+        day_keys = texts
+    return _shared_codes(raw_codes, day_keys, keys.days)
+
+def _transaction_ids(df: pd.DataFrame, dr: DetectResult, keys: Optional[TransactionKeyCodes],
+                     row_offset: int=0) -> Tuple[str, Optional[np.ndarray]]:
+    """
+    Transaction id column and its per-row values (None when an existing column is used as is).
+    `row_offset` is the file position of df's first row, so row groups of a chunk match the whole-file ones.
+    """
+    if dr.order_col is not None:
+        return dr.order_col, None
+    if dr.customer_col is not None and dr.date_col is not None:
+        # combine customer + day as transaction id: customer code in the high 32 bits, day code in the low
+        keys = keys or TransactionKeyCodes()
+        c = _customer_codes(_source_series(df, dr.customer_col), keys)
+        d = _day_codes(_source_series(df, dr.date_col), keys)
+        return "__customer_date__", (c << 32) | d
+    if dr.customer_col is not None:
+        return dr.customer_col, None
+    if dr.date_col is not None:
+        # group by date as a last resort
+        return "__date__", _day_codes(_source_series(df, dr.date_col), keys or TransactionKeyCodes())
+    # Fallback: create a rolling transaction id every N rows (very rough)
+    return "__rowgroup__", np.arange(row_offset, row_offset + len(df), dtype=np.int64) // 5
+
+def _list_transactions(df: pd.DataFrame,
+                       dr: DetectResult,
+                       keys: Optional[TransactionKeyCodes],
+                       row_offset: int=0) -> Tuple[pd.DataFrame, str, str]:
+    """
+    build_transactions for list-format frames: only the items and transaction id columns are touched; the cells
+    are tokenized in one pass and (transaction, item) duplicates are dropped on integer keys.
+    """
+    item_col = "__item__"
+    indptr, codes, names = tokenize_list_column(_source_series(df, dr.list_col or guess_column(df, LIST_FORMAT_SYNONYMS)))
+    trans_col, trans_values = _transaction_ids(df, dr, keys, row_offset)
+    trans = pd.Series(trans_values) if trans_values is not None else _source_series(df, trans_col).reset_index(drop=True)
 
-    return DetectResult(item_col=item_col, order_col=order_col, customer_col=cust_col, date_col=date_col, used_list_mode=False)
+    rows_of = np.repeat(np.arange(len(df), dtype=np.int64), np.diff(indptr))
+    valid = trans.notna().to_numpy()[rows_of]
+    rows_of, codes = rows_of[valid], codes[valid]
+    trans_codes = pd.factorize(trans)[0]  # per row; -1 only for missing ids, which are already dropped
+    first = ~pd.Series(trans_codes[rows_of].astype(np.int64) * max(len(names), 1) + codes).duplicated().to_numpy()
+    rows_of, codes = rows_of[first], codes[first]
+    long_df = pd.DataFrame({trans_col: trans.iloc[rows_of].to_numpy(), item_col: names[codes]},
+                           index=df.index[rows_of])
+    return long_df, item_col, trans_col
 
-def build_transactions(df: pd.DataFrame, dr: DetectResult) -> Tuple[pd.DataFrame, str, str]:
+def build_transactions(df: pd.DataFrame,
+                       dr: DetectResult,
+                       keys: Optional[TransactionKeyCodes]=None,
+                       row_offset: int=0) -> Tuple[pd.DataFrame, str, str]:
     """
     Returns (long_df, item_col, trans_col)
     long_df has columns [trans_col, item_col]
+    Synthetic transaction ids (__customer_date__, __date__, __rowgroup__) are int64 keys; pass `keys` to keep
+    them consistent across several calls (chunks of one file), and `row_offset` (rows before this chunk)
+    so __rowgroup__ ids are the same as for the whole file.
     """
     if dr.item_col is None:
         raise ValueError("ไม่พบคอลัมน์สินค้า (item). กรุณาตรวจสอบไฟล์หรือเพิ่มคอลัมน์สินค้าให้ตรวจจับได้")
 
-    working = df.copy()
-
-    # If list-format, explode first
     if dr.used_list_mode:
-        working = explode_list_column(working, guess_column(df, LIST_FORMAT_SYNONYMS))
-        item_col = "__item__"
-    else:
-        item_col = dr.item_col
+        return _list_transactions(df, dr, keys, row_offset)
 
-    # Determine transaction id column
-    trans_col = None
-    if dr.order_col is not None:
-        trans_col = dr.order_col
-    elif dr.customer_col is not None and dr.date_col is not None:
-        # combine customer + date as transaction id
-        c = ensure_string_col(working, dr.customer_col)
-        d = parse_date_maybe(ensure_string_col(working, dr.date_col))
-        trans_col = "__customer_date__"
-        working[trans_col] = (c.fillna("") + "|" + d.fillna(""))
-    elif dr.customer_col is not None:
-        trans_col = dr.customer_col
-    elif dr.date_col is not None:
-        # group by date as a last resort
-        d = parse_date_maybe(ensure_string_col(working, dr.date_col))
-        trans_col = "__date__"
-        working[trans_col] = d
-    else:
-        # Fallback: create a rolling transaction id every N rows (very rough)
-        trans_col = "__rowgroup__"
-        working[trans_col] = (np.arange(len(working)) // 5).astype(str)
+    working = df.copy()
+    item_col = dr.item_col
+    trans_col, trans_values = _transaction_ids(working, dr, keys, row_offset)
+    if trans_values is not None:
+        working[trans_col] = trans_values
 
     # Clean items/trans
     working = working[[trans_col, item_col]].copy()
@@ -194,40 +419,139 @@ def build_transactions(df: pd.DataFrame, dr: DetectResult) -> Tuple[pd.DataFrame
     if isinstance(working[trans_col], pd.DataFrame):
         working[trans_col] = working[trans_col].iloc[:, 0]
 
+    # drop missing values before astype(str), which would turn them into "nan"/"None" items
+    working = working.dropna(subset=[trans_col, item_col])
     working[item_col] = working[item_col].astype(str).str.strip()
     working = working[working[item_col] != ""]
-    working = working.dropna(subset=[trans_col, item_col])
 
     # Deduplicate (same item repeated within same transaction)
     working = working.drop_duplicates(subset=[trans_col, item_col])
 
     return working, item_col, trans_col
 
+@dataclass
+class ItemDictionary:
+    """
+    Dense int32 code -> item name mapping.
+    Codes are assigned in sorted name order, so sorting codes sorts names and the
+    miners can work on ints while outputs keep their alphabetical tuples.
+    """
+    names: List[str]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def decode(self, itemset) -> Tuple[str, ...]:
+        names = self.names
+        return tuple(names[c] for c in sorted(itemset))
+
+def encode_items(long_df: pd.DataFrame, item_col: str) -> Tuple[np.ndarray, ItemDictionary]:
+    """Map each distinct item of long_df[item_col] to a dense int32 code (one hash pass over the strings)."""
+    codes, uniques = pd.factorize(long_df[item_col], sort=True)
+    return codes.astype(np.int32, copy=False), ItemDictionary(names=[str(x) for x in uniques])
+
+@dataclass
+class BasketMatrix:
+    """
+    Transactions as a compressed sparse row (CSR) matrix of item codes.
+    Row t holds the (sorted, distinct) item codes of transaction t in indices[indptr[t]:indptr[t+1]].
+    tid_indptr/tids optionally hold the same matrix item-major (CSC): the sorted transaction ids of item c
+    are tids[tid_indptr[c]:tid_indptr[c+1]] (a basket store keeps both layouts on disk).
+    All miners accept a BasketMatrix in place of a list of sets.
+    """
+    indptr: np.ndarray   # int64, length n_transactions + 1
+    indices: np.ndarray  # int32 item codes
+    items: ItemDictionary
+    tid_indptr: Optional[np.ndarray] = None  # int64, length n_items + 1
+    tids: Optional[np.ndarray] = None        # int32 (int64 past 2**31 transactions) transaction ids
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_items(self) -> int:
+        return len(self.items)
+
+    def item_counts(self) -> np.ndarray:
+        """Number of transactions containing each item code."""
+        return np.bincount(self.indices, minlength=self.n_items)
+
+    def iter_rows(self, block: int=65536) -> Iterator[List[int]]:
+        """Transactions as Python lists of item codes, converted `block` rows at a time."""
+        for start in range(0, len(self), block):
+            stop = min(len(self), start + block)
+            lo, hi = int(self.indptr[start]), int(self.indptr[stop])
+            flat = np.asarray(self.indices[lo:hi]).tolist()
+            bounds = (np.asarray(self.indptr[start:stop + 1]) - lo).tolist()
+            for a, b in zip(bounds[:-1], bounds[1:]):
+                yield flat[a:b]
+
+    def rows(self) -> List[List[int]]:
+        """Transactions as Python lists of item codes."""
+        return list(self.iter_rows())
+
+    def tid_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """The item-major (tid_indptr, tids) layout; computed (and kept) when the matrix was built without it."""
+        if self.tid_indptr is None or self.tids is None:
+            tid_dtype = np.int32 if len(self) < 2**31 else np.int64
+            tids = np.repeat(np.arange(len(self), dtype=tid_dtype), np.diff(self.indptr))
+            tids = tids[np.argsort(self.indices, kind="stable")]
+            tid_indptr = np.zeros(self.n_items + 1, dtype=np.int64)
+            np.cumsum(self.item_counts(), out=tid_indptr[1:])
+            self.tid_indptr, self.tids = tid_indptr, tids
+        return self.tid_indptr, self.tids
+
+    def tid_lists(self) -> Dict[int, np.ndarray]:
+        """Vertical layout: item code -> sorted transaction ids containing it (slices of tids, not copies)."""
+        tid_indptr, tids = self.tid_index()
+        bounds = np.asarray(tid_indptr).tolist()
+        return {c: tids[bounds[c]:bounds[c+1]] for c in range(self.n_items) if bounds[c+1] > bounds[c]}
+
+def build_basket_matrix(long_df: pd.DataFrame, item_col: str, trans_col: str) -> BasketMatrix:
+    """
+    Build the CSR basket matrix from the long [trans_col, item_col] frame returned by build_transactions
+    with vectorized factorize/argsort (no per-group Python callbacks).
+    """
+    codes, items = encode_items(long_df, item_col)
+    return basket_matrix_from_codes(long_df[trans_col], codes, items)
+
+def basket_matrix_from_codes(trans_ids: pd.Series, codes: np.ndarray, items: ItemDictionary) -> BasketMatrix:
+    """CSR basket matrix from one transaction id and one item code per (deduplicated) row."""
+    trans_codes, trans_uniques = pd.factorize(trans_ids)
+    # sort by (transaction, item) in one argsort of a combined int64 key
+    key = trans_codes.astype(np.int64) * max(len(items), 1) + codes
+    order = np.argsort(key, kind="stable")
+    indices = codes[order]
+    indptr = np.zeros(len(trans_uniques) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(trans_codes, minlength=len(trans_uniques)), out=indptr[1:])
+    return BasketMatrix(indptr=indptr, indices=indices, items=items)
+
 # ----------------------------------
 # Apriori (pure Python)
 # ----------------------------------
 
 def _generate_candidates(prev_frequents: List[frozenset], k: int) -> Set[frozenset]:
-    """ Join step: generate C_k from L_{k-1} """
+    """
+    Join step: generate C_k from L_{k-1}.
+    Itemsets are canonicalized to sorted tuples; only those sharing their first k-2 items are joined,
+    and the prune step checks the remaining (k-1)-subsets against a hash index.
+    """
+    prev_sorted = sorted(tuple(sorted(s)) for s in prev_frequents)
+    prev_index = set(prev_sorted)
     cands = set()
-    n = len(prev_frequents)
-    for i in range(n):
-        for j in range(i+1, n):
-            a = prev_frequents[i]
-            b = prev_frequents[j]
-            union = a | b
-            if len(union) == k:
-                # prune: all subsets must be frequent
-                all_subsets_ok = True
-                for subset in itertools.combinations(union, k-1):
-                    if frozenset(subset) not in prev_frequents:
-                        all_subsets_ok = False
-                        break
-                if all_subsets_ok:
-                    cands.add(union)
+    for _, group in itertools.groupby(prev_sorted, key=lambda t: t[:-1]):
+        block = list(group)
+        for i in range(len(block)):
+            a = block[i]
+            for j in range(i+1, len(block)):
+                cand = a + block[j][-1:]
+                # prune: all subsets must be frequent (dropping either of the last two items gives a joined parent)
+                if all(cand[:m] + cand[m+1:] in prev_index for m in range(k-2)):
+                    cands.add(frozenset(cand))
     return cands
 
 def _count_support(candidates: Set[frozenset], transactions: List[Set[str]]) -> Dict[frozenset, float]:
+    """ Reference counter: test every candidate against every transaction """
     counts = {c: 0 for c in candidates}
     n = float(len(transactions))
     for t in transactions:
@@ -237,120 +561,690 @@ def _count_support(candidates: Set[frozenset], transactions: List[Set[str]]) ->
     # convert to support
     return {k: v/n for k, v in counts.items() if v > 0}
 
-def apriori(transactions: List[Set[str]], min_support: float=0.001) -> Dict[int, Dict[frozenset, float]]:
-    """Return dictionary k -> {itemset: support} of frequent itemsets."""
+# ----------------------------------
+# Support counting engines
+# ----------------------------------
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:  # Python < 3.10
+    def _popcount(x: int) -> int:
+        return bin(x).count("1")
+
+class PythonSupportCounter:
+    """Pure-Python reference engine (nested loop over transactions x candidates)."""
+    name = "python"
+
+    def __init__(self, transactions):
+        if isinstance(transactions, BasketMatrix):
+            transactions = [set(r) for r in transactions.rows()]
+        self.transactions = transactions
+
+    def count(self, candidates: Set[frozenset]) -> Dict[frozenset, float]:
+        return _count_support(candidates, self.transactions)
+
+class BitmapSupportCounter:
+    """
+    Vertical engine: one bitmap per item (bit t is set when transaction t contains the item),
+    stored as a Python int so AND and popcount run in C.
+    Bitmaps are built lazily, so only items that appear in candidates (i.e. frequent items) cost memory.
+    """
+    name = "bitmap"
+
+    def __init__(self, transactions):
+        self.n_transactions = len(transactions)
+        if isinstance(transactions, BasketMatrix):
+            # slices of the item-major layout; a memory-mapped store is only read for items that get a bitmap
+            self._tids = transactions.tid_lists()
+        else:
+            self._tids = {}
+            for tid, t in enumerate(transactions):
+                for item in t:
+                    self._tids.setdefault(item, []).append(tid)
+        self._bitmaps: Dict[Any, int] = {}
+
+    def _bitmap(self, item) -> int:
+        bm = self._bitmaps.get(item)
+        if bm is None:
+            bits = np.zeros(self.n_transactions, dtype=bool)
+            bits[np.asarray(self._tids.get(item, []), dtype=np.int64)] = True
+            bm = int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+            self._bitmaps[item] = bm
+        return bm
+
+    def raw_counts(self, keys: List[Tuple]) -> List[int]:
+        """Transaction counts for candidates given as sorted item tuples, in the order given."""
+        out = []
+        # Sorted keys make candidates sharing a (k-1)-prefix adjacent, so the prefix AND is reused
+        prefix_key, prefix_bm = None, 0
+        for items in keys:
+            if items[:-1] != prefix_key:
+                prefix_key = items[:-1]
+                prefix_bm = -1  # all bits set
+                for item in prefix_key:
+                    prefix_bm &= self._bitmap(item)
+            out.append(_popcount(prefix_bm & self._bitmap(items[-1])))
+        return out
+
+    def count(self, candidates: Set[frozenset]) -> Dict[frozenset, float]:
+        n = float(self.n_transactions)
+        keys = sorted(tuple(sorted(c)) for c in candidates)
+        return {frozenset(items): v/n for items, v in zip(keys, self.raw_counts(keys)) if v > 0}
+
+# Worker-side state of ParallelSupportCounter: each worker process owns exactly one transaction shard,
+# mapped from shared memory, and the bitmap counter built over it on the first count
+_shared_baskets = None
+_shard_counter: Optional[BitmapSupportCounter] = None
+
+def _attach_shared_shard(shm_names: Tuple[str, str], n_transactions: int, n_values: int, items: ItemDictionary,
+                         start: int, stop: int):
+    global _shared_baskets, _shard_counter
+    indptr_shm = shared_memory.SharedMemory(name=shm_names[0])
+    indices_shm = shared_memory.SharedMemory(name=shm_names[1])
+    indptr = np.ndarray((n_transactions + 1,), dtype=np.int64, buffer=indptr_shm.buf)
+    indices = np.ndarray((n_values,), dtype=np.int32, buffer=indices_shm.buf)
+    lo, hi = indptr[start], indptr[stop]
+    # rows start..stop-1; the indices slice is a view of the shared buffer
+    shard = BasketMatrix(indptr[start:stop + 1] - lo, indices[lo:hi], items)
+    # keep the SharedMemory handles alive as long as the arrays
+    _shared_baskets = (indptr_shm, indices_shm, shard)
+    _shard_counter = None
+
+def _count_shard(keys: List[Tuple]) -> List[int]:
+    global _shard_counter
+    if _shard_counter is None:
+        _shard_counter = BitmapSupportCounter(_shared_baskets[2])
+    return _shard_counter.raw_counts(keys)
+
+class ParallelSupportCounter:
+    """
+    BitmapSupportCounter split across processes: transactions are partitioned into one contiguous shard
+    per worker, each worker counts its shard and the integer counts are summed (exact, so results match
+    the serial engine). Every shard has its own single-process executor, so a worker only ever builds the
+    tid lists and bitmaps of its shard. The CSR arrays are copied into shared memory once and mapped by the
+    workers instead of being pickled to them. Needs a BasketMatrix; call close() to stop the workers (which
+    frees their counters) and the shared memory.
+    """
+    name = "parallel"
+
+    def __init__(self, transactions: BasketMatrix, workers: Optional[int]=None):
+        if not isinstance(transactions, BasketMatrix):
+            raise TypeError("ParallelSupportCounter needs a BasketMatrix")
+        self.n_transactions = len(transactions)
+        workers = max(1, min(workers or os.cpu_count() or 1, self.n_transactions))
+        bounds = np.linspace(0, self.n_transactions, workers + 1).astype(np.int64).tolist()
+        self._shards = list(zip(bounds[:-1], bounds[1:]))
+        self._shm = []
+        self._executors = []
+        try:
+            for arr in (transactions.indptr.astype(np.int64, copy=False), transactions.indices.astype(np.int32, copy=False)):
+                shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+                self._shm.append(shm)
+                np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+            for start, stop in self._shards:
+                self._executors.append(ProcessPoolExecutor(
+                    max_workers=1,
+                    initializer=_attach_shared_shard,
+                    initargs=((self._shm[0].name, self._shm[1].name), self.n_transactions,
+                              len(transactions.indices), transactions.items, start, stop)))
+        except Exception:
+            self.close()
+            raise
+
+    def count(self, candidates: Set[frozenset]) -> Dict[frozenset, float]:
+        n = float(self.n_transactions)
+        keys = sorted(tuple(sorted(c)) for c in candidates)
+        totals = np.zeros(len(keys), dtype=np.int64)
+        futures = [executor.submit(_count_shard, keys) for executor in self._executors]
+        for future in futures:
+            totals += np.asarray(future.result(), dtype=np.int64)
+        return {frozenset(items): v/n for items, v in zip(keys, totals.tolist()) if v > 0}
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown()
+        self._executors = []
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+        self._shm = []
+
+SUPPORT_COUNTERS = {
+    PythonSupportCounter.name: PythonSupportCounter,
+    BitmapSupportCounter.name: BitmapSupportCounter,
+}
+
+def apriori(transactions, min_support: float=0.001,
+            counter: str="bitmap",
+            workers: int=1) -> Dict[int, Dict[frozenset, float]]:
+    """
+    Return dictionary k -> {itemset: support} of frequent itemsets.
+    `transactions` is a BasketMatrix or a list of item sets.
+    `counter` selects the support counting engine (see SUPPORT_COUNTERS); "python" is the reference implementation.
+    `workers` > 1 spreads bitmap counting over that many processes (ParallelSupportCounter, BasketMatrix only).
+    """
+    if counter not in SUPPORT_COUNTERS:
+        raise ValueError(f"Unknown support counter: {counter!r} (expected one of {sorted(SUPPORT_COUNTERS)})")
     # 1-itemsets
-    item_counts = {}
     n = float(len(transactions))
-    for t in transactions:
-        for i in t:
-            item_counts[i] = item_counts.get(i, 0) + 1
-    L1 = {frozenset([i]): c/n for i, c in item_counts.items() if (c/n) >= min_support}
+    with span("apriori.level", k=1) as level:
+        if isinstance(transactions, BasketMatrix):
+            item_counts = {i: c for i, c in enumerate(transactions.item_counts().tolist()) if c}
+        else:
+            item_counts = {}
+            for t in transactions:
+                for i in t:
+                    item_counts[i] = item_counts.get(i, 0) + 1
+        L1 = {frozenset([i]): c/n for i, c in item_counts.items() if (c/n) >= min_support}
+        level.set(candidates=len(item_counts), frequent=len(L1))
     frequents = {1: L1}
     k = 2
     prev = list(L1.keys())
+    if workers > 1 and counter == "bitmap" and isinstance(transactions, BasketMatrix) and len(prev) > 1:
+        engine = ParallelSupportCounter(transactions, workers=workers)
+    else:
+        engine = SUPPORT_COUNTERS[counter](transactions)
 
-    while prev:
-        Ck = _generate_candidates(prev, k)
-        Sk = _count_support(Ck, transactions)
-        Lk = {s: sup for s, sup in Sk.items() if sup >= min_support}
-        if not Lk:
-            break
-        frequents[k] = Lk
-        prev = list(Lk.keys())
-        k += 1
+    try:
+        while prev:
+            with span("apriori.level", k=k) as level:
+                Ck = _generate_candidates(prev, k)
+                Sk = engine.count(Ck)
+                Lk = {s: sup for s, sup in Sk.items() if sup >= min_support}
+                level.set(candidates=len(Ck), frequent=len(Lk))
+            if not Lk:
+                break
+            frequents[k] = Lk
+            prev = list(Lk.keys())
+            k += 1
+    finally:
+        if isinstance(engine, ParallelSupportCounter):
+            engine.close()
 
     return frequents
 
-def generate_rules(frequents: Dict[int, Dict[frozenset, float]], min_lift: float=1.0) -> List[Dict[str, Any]]:
-    """Generate association rules from frequent itemsets with standard metrics."""
+# ----------------------------------
+# FP-Growth (pure Python)
+# ----------------------------------
+
+class _FPNode:
+    __slots__ = ("item", "count", "parent", "children")
+
+    def __init__(self, item, parent):
+        self.item = item
+        self.count = 0
+        self.parent = parent
+        self.children = {}
+
+def _build_fptree(weighted: List[Tuple[Any, int]], min_count: int):
+    """
+    Build an FP-tree from (items, count) pairs.
+    Returns (header, item_counts, rank): header maps item -> its tree nodes,
+    rank orders frequent items by descending count (the insertion order of tree paths).
+    """
+    item_counts = {}
+    for items, c in weighted:
+        for i in items:
+            item_counts[i] = item_counts.get(i, 0) + c
+    item_counts = {i: c for i, c in item_counts.items() if c >= min_count}
+    rank = {i: r for r, i in enumerate(sorted(item_counts, key=lambda i: (-item_counts[i], i)))}
+    root = _FPNode(None, None)
+    header = {i: [] for i in item_counts}
+    for items, c in weighted:
+        node = root
+        for i in sorted((i for i in items if i in rank), key=rank.__getitem__):
+            child = node.children.get(i)
+            if child is None:
+                child = _FPNode(i, node)
+                node.children[i] = child
+                header[i].append(child)
+            child.count += c
+            node = child
+    return header, item_counts, rank
+
+def _fp_mine(header, item_counts, rank, suffix: frozenset, min_count: int, out: Dict[frozenset, int]):
+    # least frequent first: their conditional trees are the smallest
+    for item in sorted(item_counts, key=rank.__getitem__, reverse=True):
+        itemset = suffix | {item}
+        out[itemset] = item_counts[item]
+        # conditional pattern base: prefix paths ending at `item`
+        base = []
+        for node in header[item]:
+            path = []
+            p = node.parent
+            while p.item is not None:
+                path.append(p.item)
+                p = p.parent
+            if path:
+                base.append((path, node.count))
+        if base:
+            sub_header, sub_counts, sub_rank = _build_fptree(base, min_count)
+            if sub_counts:
+                _fp_mine(sub_header, sub_counts, sub_rank, itemset, min_count, out)
+
+class _WeightedRows:
+    """Re-iterable (row, 1) pairs over a BasketMatrix."""
+
+    def __init__(self, baskets: BasketMatrix):
+        self.baskets = baskets
+
+    def __iter__(self):
+        return ((row, 1) for row in self.baskets.iter_rows())
+
+def fpgrowth(transactions, min_support: float=0.001) -> Dict[int, Dict[frozenset, float]]:
+    """
+    Same output as apriori() (k -> {itemset: support}), mined from an FP-tree without candidate generation.
+    `transactions` is a BasketMatrix or a list of item sets.
+    """
+    n = float(len(transactions))
+    frequents = {1: {}}
+    if not transactions:
+        return frequents
+    # smallest count that passes the same `count/n >= min_support` test apriori applies
+    min_count = max(1, int(math.ceil(min_support * n)))
+    while min_count > 1 and (min_count - 1)/n >= min_support:
+        min_count -= 1
+    while min_count/n < min_support:
+        min_count += 1
+
+    counts = {}
+    if isinstance(transactions, BasketMatrix):
+        # _build_fptree reads the rows twice; convert them block by block each time instead of holding a copy
+        weighted = _WeightedRows(transactions)
+    else:
+        weighted = [(t, 1) for t in transactions]
+    header, item_counts, rank = _build_fptree(weighted, min_count)
+    _fp_mine(header, item_counts, rank, frozenset(), min_count, counts)
+    for itemset, c in counts.items():
+        frequents.setdefault(len(itemset), {})[itemset] = c/n
+    return {k: frequents[k] for k in sorted(frequents)}
+
+MINERS = {
+    "apriori": apriori,
+    "fpgrowth": fpgrowth,
+}
+
+# Sort order of generate_rules output for each `by` metric (all descending)
+RULE_SORT_KEYS = {
+    "lift": ("lift", "confidence", "support"),
+    "confidence": ("confidence", "lift", "support"),
+    "support": ("support", "lift", "confidence"),
+}
+
+def _itemset_rules(itemset: frozenset,
+                   supp_ab: float,
+                   support_lookup: Dict[frozenset, float],
+                   min_confidence: float=0.0):
+    """
+    Yield (antecedent, consequent, confidence, lift) for the splits of itemset with confidence >= min_confidence.
+    Consequents grow level by level (ap-genrules): moving an item from the antecedent to the consequent can
+    only lower confidence, so a consequent is extended only if it passed and all its subsets passed.
+    """
+    items = sorted(itemset)
+    consequents = [(item,) for item in items]
+    size = 1
+    while consequents:
+        passed = []
+        for consequent in consequents:
+            consequent = frozenset(consequent)
+            antecedent = itemset - consequent
+            supp_a = support_lookup.get(antecedent, 0.0)
+            supp_b = support_lookup.get(consequent, 0.0)
+            if supp_a == 0 or supp_b == 0:
+                continue
+            confidence = supp_ab / supp_a
+            if confidence < min_confidence:
+                continue
+            passed.append(consequent)
+            yield antecedent, consequent, confidence, confidence / supp_b
+        size += 1
+        if size >= len(items):
+            break
+        if len(passed) == len(consequents):
+            # nothing was pruned: the next level is every combination (same order as the join below)
+            consequents = list(itertools.combinations(items, size))
+        else:
+            consequents = sorted(tuple(sorted(c)) for c in _generate_candidates(passed, size))
+
+def _rule_bound(itemset: frozenset, supp_ab: float, support_lookup: Dict[frozenset, float], by: str) -> float:
+    """
+    Upper bound of metric `by` over every antecedent/consequent split of itemset.
+    Confidence: a side missing item j is a subset of itemset - {j}, so the antecedent has support at least
+    min_j supp(itemset - {j}) and confidence = supp_ab/supp_a <= supp_ab/that.
+    Lift: the bound is the exact maximum of supp_ab/(supp(A)*supp(B)) over the splits A, B of itemset; lift is
+    symmetric, so only the 2^(k-1) - 1 unordered splits are checked (two support lookups each, no rules built).
+    """
+    if by == "support":
+        return supp_ab
+    if by == "confidence":
+        floor = min(support_lookup.get(itemset - {item}, 0.0) for item in itemset)
+        if floor <= 0:
+            return math.inf
+        bound = supp_ab / floor
+    else:
+        items = sorted(itemset)
+        first, rest = items[:1], items[1:]
+        smallest = math.inf
+        for size in range(len(rest)):
+            for combo in itertools.combinations(rest, size):
+                side = frozenset(first + list(combo))
+                product = support_lookup.get(side, 0.0) * support_lookup.get(itemset - side, 0.0)
+                # splits with a zero-support side yield no rule (see _itemset_rules)
+                if 0 < product < smallest:
+                    smallest = product
+        if math.isinf(smallest):
+            return 0.0
+        bound = supp_ab / smallest
+    # headroom for rounding: the metric itself is computed in a different order
+    return bound * (1 + 1e-9)
+
+def _generate_top_rules(frequents: Dict[int, Dict[frozenset, float]],
+                        support_lookup: Dict[frozenset, float],
+                        min_lift: float,
+                        min_confidence: float,
+                        top_k: int,
+                        by: str) -> List[Dict[str, Any]]:
+    """
+    The top_k rules by RULE_SORT_KEYS[by], kept in a bounded min-heap.
+    Itemsets are visited by decreasing _rule_bound and mining stops once the bound falls below the
+    k-th best score; splits that cannot enter the heap are never turned into rule dicts.
+    Ties keep the generation order, so the result equals the first top_k rules of the full list.
+    """
+    order = RULE_SORT_KEYS[by]
+    if top_k <= 0:
+        return []
+
+    itemsets = []
+    for k, level in frequents.items():
+        if k < 2:
+            continue
+        for itemset, supp_ab in level.items():
+            itemsets.append((_rule_bound(itemset, supp_ab, support_lookup, by), len(itemsets), itemset, supp_ab))
+    itemsets.sort(key=lambda entry: entry[0], reverse=True)
+
+    heap = []  # (score tuple, -generation sequence, antecedent, consequent)
+    for bound, ordinal, itemset, supp_ab in itemsets:
+        if len(heap) >= top_k and bound < heap[0][0][0]:
+            break
+        rules = _itemset_rules(itemset, supp_ab, support_lookup, min_confidence)
+        for split, (antecedent, consequent, confidence, lift) in enumerate(rules):
+            if lift < min_lift:
+                continue
+            metrics = {"support": supp_ab, "confidence": confidence, "lift": lift}
+            score = tuple(metrics[m] for m in order)
+            if len(heap) >= top_k and score < heap[0][0]:
+                continue
+            entry = (score, -((ordinal << 32) | split), antecedent, consequent)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    heap.sort(reverse=True)
+    return [{
+        "antecedents": tuple(sorted(antecedent)),
+        "consequents": tuple(sorted(consequent)),
+        "support": score[order.index("support")],
+        "confidence": score[order.index("confidence")],
+        "lift": score[order.index("lift")],
+    } for score, _, antecedent, consequent in heap]
+
+def generate_rules(frequents: Dict[int, Dict[frozenset, float]],
+                   min_lift: float=1.0,
+                   top_k: Optional[int]=None,
+                   by: str="lift",
+                   min_confidence: float=0.0) -> List[Dict[str, Any]]:
+    """
+    Generate association rules from frequent itemsets with standard metrics.
+    With `top_k`, only the best top_k rules by `by` ("lift", "confidence" or "support") are mined.
+    Rules below `min_confidence` are pruned while consequents are grown (see _itemset_rules).
+    """
+    if by not in RULE_SORT_KEYS:
+        raise ValueError(f"Unknown rule ranking: {by!r} (expected one of {sorted(RULE_SORT_KEYS)})")
     # Build a support lookup for convenience
     support_lookup = {}
     for k, level in frequents.items():
         for itemset, sup in level.items():
             support_lookup[itemset] = sup
 
+    if top_k is not None:
+        return _generate_top_rules(frequents, support_lookup, min_lift, min_confidence, top_k, by)
+
     rules = []
     for k, level in frequents.items():
         if k < 2:
             continue
         for itemset, supp_ab in level.items():
-            items = list(itemset)
-            # all non-empty proper subsets
-            for r in range(1, len(items)):
-                for antecedent in itertools.combinations(items, r):
-                    antecedent = frozenset(antecedent)
-                    consequent = itemset - antecedent
-                    if not consequent:
-                        continue
-                    supp_a = support_lookup.get(antecedent, 0.0)
-                    supp_b = support_lookup.get(consequent, 0.0)
-                    if supp_a == 0 or supp_b == 0:
-                        continue
-                    confidence = supp_ab / supp_a if supp_a > 0 else 0.0
-                    lift = confidence / supp_b if supp_b > 0 else float("inf")
-                    if lift < min_lift:
-                        continue
-                    rules.append({
-                        "antecedents": tuple(sorted(list(antecedent))),
-                        "consequents": tuple(sorted(list(consequent))),
-                        "support": supp_ab,
-                        "confidence": confidence,
-                        "lift": lift,
-                    })
-    # Sort by lift desc then confidence desc
-    rules.sort(key=lambda x: (x["lift"], x["confidence"], x["support"]), reverse=True)
+            for antecedent, consequent, confidence, lift in _itemset_rules(itemset, supp_ab, support_lookup, min_confidence):
+                if lift < min_lift:
+                    continue
+                rules.append({
+                    "antecedents": tuple(sorted(antecedent)),
+                    "consequents": tuple(sorted(consequent)),
+                    "support": supp_ab,
+                    "confidence": confidence,
+                    "lift": lift,
+                })
+    # Sort by lift desc then confidence desc (or by the `by` metric first)
+    rules.sort(key=operator.itemgetter(*RULE_SORT_KEYS[by]), reverse=True)
     return rules
 
 # ----------------------------------
 # Public API
 # ----------------------------------
 
-def analyze_dataframe(df: pd.DataFrame,
-                      min_support: float=0.001,
-                      min_lift: float=1.0) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+def analyze_baskets(baskets: BasketMatrix,
+                    min_support: float=0.001,
+                    min_lift: float=1.0,
+                    algorithm: str="apriori",
+                    top_k: Optional[int]=None,
+                    by: str="lift",
+                    min_confidence: float=0.0,
+                    workers: int=1) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
-    Returns (rules_df, frequent_itemsets_df, meta)
+    Mine a BasketMatrix. Returns (rules_df, frequent_itemsets_df) with item names decoded.
+    `algorithm` picks the frequent itemset miner: "apriori" or "fpgrowth" (see MINERS).
+    `top_k`/`by` keep only the best rules and `min_confidence` prunes weak ones (see generate_rules).
+    `workers` > 1 counts Apriori supports in parallel (FP-Growth runs on one core).
     """
-    dr = detect_columns(df)
-    long_df, item_col, trans_col = build_transactions(df, dr)
-
-    # Build transactions (list of sets)
-    transactions = (
-        long_df.groupby(trans_col)[item_col]
-        .apply(lambda s: set([str(x) for x in s.values if pd.notna(x) and str(x).strip() != ""]))
-        .tolist()
-    )
-    # Apriori
-    freqs = apriori(transactions, min_support=min_support)
-    rules = generate_rules(freqs, min_lift=min_lift)
-
-    # Convert frequents to DataFrame
-    rows = []
-    for k, level in freqs.items():
-        for itemset, sup in level.items():
-            rows.append({
-                "itemset": tuple(sorted(list(itemset))),
-                "length": k,
-                "support": sup
-            })
-    fi_df = pd.DataFrame(rows)
-    if not fi_df.empty:
-        fi_df = fi_df.sort_values(["length","support"], ascending=[True, False]).reset_index(drop=True)
-    rules_df = pd.DataFrame(rules)
-
-    meta = {
+    if algorithm not in MINERS:
+        raise ValueError(f"Unknown algorithm: {algorithm!r} (expected one of {sorted(MINERS)})")
+
+    # Frequent itemsets
+    with span(algorithm, rows_in=len(baskets), workers=workers) as mining:
+        if algorithm == "apriori":
+            freqs = apriori(baskets, min_support=min_support, workers=workers)
+        else:
+            freqs = MINERS[algorithm](baskets, min_support=min_support)
+        mining.set(rows_out=sum(len(level) for level in freqs.values()))
+    return frequents_to_frames(freqs, baskets.items, min_lift=min_lift, top_k=top_k, by=by,
+                               min_confidence=min_confidence)
+
+def frequents_to_frames(freqs: Dict[int, Dict[frozenset, float]],
+                        items: ItemDictionary,
+                        min_lift: float=1.0,
+                        top_k: Optional[int]=None,
+                        by: str="lift",
+                        min_confidence: float=0.0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Rules and frequent itemsets of mined itemset codes as (rules_df, frequent_itemsets_df) with names."""
+    n_itemsets = sum(len(level) for level in freqs.values())
+    with span("generate_rules", rows_in=n_itemsets, top_k=top_k) as s:
+        rules = generate_rules(freqs, min_lift=min_lift, top_k=top_k, by=by, min_confidence=min_confidence)
+        s.set(rows_out=len(rules))
+
+    with span("result_frames", rows_in=n_itemsets + len(rules)):
+        # Convert frequents to DataFrame
+        rows = []
+        for k, level in freqs.items():
+            for itemset, sup in level.items():
+                rows.append({
+                    "itemset": items.decode(itemset),
+                    "length": k,
+                    "support": sup
+                })
+        fi_df = pd.DataFrame(rows)
+        if not fi_df.empty:
+            fi_df = fi_df.sort_values(["length","support"], ascending=[True, False]).reset_index(drop=True)
+        for r in rules:
+            r["antecedents"] = items.decode(r["antecedents"])
+            r["consequents"] = items.decode(r["consequents"])
+        rules_df = pd.DataFrame(rules)
+    return rules_df, fi_df
+
+def _basket_meta(baskets: BasketMatrix, dr: DetectResult, item_col: str, trans_col: str, algorithm: str) -> Dict[str, Any]:
+    return {
         "detected_item_col": item_col,
         "detected_trans_col": trans_col,
+        "algorithm": algorithm,
         "heuristics": {
             "order_col": dr.order_col,
             "customer_col": dr.customer_col,
             "date_col": dr.date_col,
             "used_list_mode": dr.used_list_mode
         },
-        "n_transactions": len(transactions),
-        "n_unique_items": int(long_df[item_col].nunique())
+        "detection": dr.detection,
+        "n_transactions": len(baskets),
+        "n_unique_items": len(baskets.items)
     }
+
+def analyze_dataframe(df: pd.DataFrame,
+                      min_support: float=0.001,
+                      min_lift: float=1.0,
+                      algorithm: str="apriori",
+                      top_k: Optional[int]=None,
+                      by: str="lift",
+                      min_confidence: float=0.0,
+                      workers: int=1) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+    """
+    Returns (rules_df, frequent_itemsets_df, meta)
+    `algorithm` picks the frequent itemset miner: "apriori" or "fpgrowth" (see MINERS).
+    """
+    if algorithm not in MINERS:
+        raise ValueError(f"Unknown algorithm: {algorithm!r} (expected one of {sorted(MINERS)})")
+    with span("detect_columns", rows_in=len(df)):
+        dr = detect_columns(df)
+    with span("build_transactions", rows_in=len(df)) as s:
+        long_df, item_col, trans_col = build_transactions(df, dr)
+        s.set(rows_out=len(long_df))
+
+    # CSR basket matrix of int item codes; names are decoded only when the output tables are built
+    with span("build_basket_matrix", rows_in=len(long_df)) as s:
+        baskets = build_basket_matrix(long_df, item_col, trans_col)
+        s.set(rows_out=len(baskets), items=baskets.n_items)
+    rules_df, fi_df = analyze_baskets(baskets, min_support=min_support, min_lift=min_lift, algorithm=algorithm,
+                                      top_k=top_k, by=by, min_confidence=min_confidence, workers=workers)
+    return rules_df, fi_df, _basket_meta(baskets, dr, item_col, trans_col, algorithm)
+
+# ----------------------------------
+# Streaming CSV ingestion
+# ----------------------------------
+
+def _detected_source_columns(df: pd.DataFrame, dr: DetectResult) -> List[str]:
+    """Raw columns build_transactions needs for this detection result."""
+    cols = [dr.item_col if not dr.used_list_mode else dr.list_col or guess_column(df, LIST_FORMAT_SYNONYMS),
+            dr.order_col, dr.customer_col, dr.date_col]
+    return [c for c in dict.fromkeys(cols) if c is not None]
+
+def stream_csv_baskets(path: str,
+                       chunksize: int=200_000,
+                       sep: str=",",
+                       encoding: Optional[str]=None,
+                       usecols: Optional[List[Any]]=None,
+                       detect_rows: int=1000) -> Tuple[BasketMatrix, DetectResult, str, str, Dict[str, Any]]:
+    """
+    Build a BasketMatrix from a CSV without materializing the file.
+    Columns are detected on the first `detect_rows` rows, then the file is read `chunksize` rows at a time
+    (as text, only the detected columns); each chunk is reduced to (transaction id, item code) int pairs.
+    Peak memory is one chunk plus the integer pairs and the item/transaction key dictionaries.
+    Like the in-memory read, a file that does not decode with `encoding` is read again with undecodable
+    bytes replaced (stats["encodingErrors"] = "replace") rather than failing.
+    Returns (baskets, detect_result, item_col, trans_col, stats).
+    """
+    try:
+        return _stream_csv_baskets(path, chunksize, sep, encoding, usecols, detect_rows, "strict")
+    except UnicodeDecodeError:
+        baskets, dr, item_col, trans_col, stats = _stream_csv_baskets(
+            path, chunksize, sep, encoding, usecols, detect_rows, "replace")
+        stats["encodingErrors"] = "replace"
+        return baskets, dr, item_col, trans_col, stats
+
+def _stream_csv_baskets(path: str,
+                        chunksize: int,
+                        sep: str,
+                        encoding: Optional[str],
+                        usecols: Optional[List[Any]],
+                        detect_rows: int,
+                        encoding_errors: str) -> Tuple[BasketMatrix, DetectResult, str, str, Dict[str, Any]]:
+    read_kwargs = dict(sep=sep, encoding=encoding, encoding_errors=encoding_errors, dtype=str)
+    header = pd.read_csv(path, nrows=0, usecols=usecols, **read_kwargs)
+    sample = pd.read_csv(path, nrows=detect_rows, usecols=usecols, **read_kwargs)
+    dr = detect_columns(sample)
+    if dr.item_col is None:
+        raise ValueError("ไม่พบคอลัมน์สินค้า (item). กรุณาตรวจสอบไฟล์หรือเพิ่มคอลัมน์สินค้าให้ตรวจจับได้")
+    needed = _detected_source_columns(sample, dr)
+
+    item_index: Dict[str, int] = {}
+    trans_index: Dict[Any, int] = {}
+    keys = TransactionKeyCodes()
+    trans_parts, item_parts = [], []
+    n_rows = n_chunks = 0
+    item_col = trans_col = None
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=needed, **read_kwargs):
+        long_chunk, item_col, trans_col = build_transactions(chunk, dr, keys, row_offset=n_rows)
+        n_rows += len(chunk)
+        n_chunks += 1
+        t_codes, t_uniques = pd.factorize(long_chunk[trans_col])
+        i_codes, i_uniques = pd.factorize(long_chunk[item_col])
+        t_map = np.array([trans_index.setdefault(k, len(trans_index)) for k in t_uniques], dtype=np.int64)
+        i_map = np.array([item_index.setdefault(k, len(item_index)) for k in i_uniques], dtype=np.int32)
+        trans_parts.append(t_map[t_codes] if len(t_map) else np.zeros(0, dtype=np.int64))
+        item_parts.append(i_map[i_codes] if len(i_map) else np.zeros(0, dtype=np.int32))
+
+    n_trans = len(trans_index)
+    del trans_index
+    # Re-code items in sorted name order (the ItemDictionary convention)
+    names = np.array(list(item_index), dtype=object)
+    order = np.argsort(names, kind="stable")
+    recode = np.empty(len(names), dtype=np.int32)
+    recode[order] = np.arange(len(names), dtype=np.int32)
+    trans_ids = np.concatenate(trans_parts) if trans_parts else np.zeros(0, dtype=np.int64)
+    item_codes = recode[np.concatenate(item_parts)] if item_parts else np.zeros(0, dtype=np.int32)
+    del trans_parts, item_parts
+
+    # Same (transaction, item) pair may repeat across chunks; unique() also sorts rows by (transaction, item)
+    width = max(len(names), 1)
+    keys = np.unique(trans_ids * width + item_codes)
+    indices = (keys % width).astype(np.int32)
+    indptr = np.zeros(n_trans + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // width, minlength=n_trans), out=indptr[1:])
+    baskets = BasketMatrix(indptr=indptr, indices=indices,
+                           items=ItemDictionary(names=[str(x) for x in names[order]]))
+    stats = {"n_rows": n_rows, "n_columns": len(header.columns), "n_chunks": n_chunks, "chunksize": chunksize}
+    return baskets, dr, item_col or dr.item_col, trans_col, stats
+
+def analyze_csv_stream(path: str,
+                       min_support: float=0.001,
+                       min_lift: float=1.0,
+                       algorithm: str="apriori",
+                       chunksize: int=200_000,
+                       sep: str=",",
+                       encoding: Optional[str]=None,
+                       usecols: Optional[List[Any]]=None,
+                       top_k: Optional[int]=None,
+                       by: str="lift",
+                       min_confidence: float=0.0,
+                       workers: int=1) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+    """Streaming counterpart of analyze_dataframe for CSV files; meta also carries the ingestion stats."""
+    if algorithm not in MINERS:
+        raise ValueError(f"Unknown algorithm: {algorithm!r} (expected one of {sorted(MINERS)})")
+    with span("stream_csv_baskets", chunksize=chunksize) as s:
+        baskets, dr, item_col, trans_col, stats = stream_csv_baskets(
+            path, chunksize=chunksize, sep=sep, encoding=encoding, usecols=usecols)
+        s.set(rows_in=stats["n_rows"], rows_out=len(baskets), items=baskets.n_items)
+    rules_df, fi_df = analyze_baskets(baskets, min_support=min_support, min_lift=min_lift, algorithm=algorithm,
+                                      top_k=top_k, by=by, min_confidence=min_confidence, workers=workers)
+    meta = _basket_meta(baskets, dr, item_col, trans_col, algorithm)
+    meta["streaming"] = stats
     return rules_df, fi_df, meta
 
 def _dedupe_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -367,6 +1261,14 @@ def _dedupe_columns(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = new_cols
     return df
 
+def sniff_separator(path: str, candidates: Tuple[str, ...]=(",", "\t", ";", "|")) -> str:
+    """Pick the candidate separator that occurs most often in the header line."""
+    with open(path, "rb") as f:
+        first_line = f.readline()
+    counts = {c: first_line.count(c.encode()) for c in candidates}
+    best = max(candidates, key=lambda c: counts[c])
+    return best if counts[best] > 0 else ","
+
 def read_any(path: str, sep: Optional[str]="auto", sheet: Optional[str]=None) -> pd.DataFrame:
     ext = os.path.splitext(path)[1].lower()
     if ext in [".xls", ".xlsx", ".xlsm"]:
@@ -393,10 +1295,136 @@ def read_any(path: str, sep: Optional[str]="auto", sheet: Optional[str]=None) ->
         df = pd.read_csv(path, engine="python", on_bad_lines="skip")
         return _dedupe_columns(df)
 
+# ----------------------------------
+# On-disk basket store
+# ----------------------------------
+# A directory holding a BasketMatrix as .npy files plus items.json (code -> name) and meta.json
+# (detection results and a fingerprint of the source file). Arrays are memory-mapped on load, so
+# miners only touch the pages they read and the OS page cache decides what stays resident.
+
+# 2: adds the item-major layout (tid_indptr.npy, tids.npy); older stores are rebuilt
+BASKET_STORE_FORMAT = 2
+
+def _source_fingerprint(path: str) -> Dict[str, Any]:
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def save_basket_store(baskets: BasketMatrix, store: str, meta: Optional[Dict[str, Any]]=None) -> None:
+    """
+    Write baskets (both layouts) to the store directory, replacing it: the new store is written to a temp
+    dir, the old one is renamed aside, the new one renamed in and only then the old one deleted.
+    """
+    store = os.path.normpath(store)
+    tmp = f"{store}.{os.getpid()}.tmp"
+    old = f"{store}.{os.getpid()}.old"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    tid_indptr, tids = baskets.tid_index()
+    np.save(os.path.join(tmp, "indptr.npy"), np.asarray(baskets.indptr, dtype=np.int64))
+    np.save(os.path.join(tmp, "indices.npy"), np.asarray(baskets.indices, dtype=np.int32))
+    np.save(os.path.join(tmp, "tid_indptr.npy"), np.asarray(tid_indptr, dtype=np.int64))
+    np.save(os.path.join(tmp, "tids.npy"), np.asarray(tids))
+    with open(os.path.join(tmp, "items.json"), "w", encoding="utf-8") as f:
+        json.dump(baskets.items.names, f, ensure_ascii=False)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"format": BASKET_STORE_FORMAT, **(meta or {})}, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.isdir(store):
+        os.replace(store, old)
+    try:
+        os.replace(tmp, store)
+    except OSError:
+        if os.path.isdir(old) and not os.path.exists(store):
+            os.replace(old, store)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
+
+def read_basket_store_meta(store: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(store, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("format") == BASKET_STORE_FORMAT else None
+
+def load_basket_store(store: str) -> Tuple[BasketMatrix, Dict[str, Any]]:
+    """Open a store zero-copy: indptr/indices/tid_indptr/tids are read-only np.memmap arrays. Returns (baskets, meta)."""
+    meta = read_basket_store_meta(store)
+    if meta is None:
+        raise ValueError(f"Not a basket store: {store}")
+    indptr = np.load(os.path.join(store, "indptr.npy"), mmap_mode="r")
+    indices = np.load(os.path.join(store, "indices.npy"), mmap_mode="r")
+    tid_indptr = np.load(os.path.join(store, "tid_indptr.npy"), mmap_mode="r")
+    tids = np.load(os.path.join(store, "tids.npy"), mmap_mode="r")
+    with open(os.path.join(store, "items.json"), encoding="utf-8") as f:
+        items = ItemDictionary(names=json.load(f))
+    return BasketMatrix(indptr, indices, items, tid_indptr=tid_indptr, tids=tids), meta
+
+def basket_store_matches(store: str, path: str) -> bool:
+    """True when the store was built from `path` as it is now (same size and mtime)."""
+    meta = read_basket_store_meta(store)
+    return meta is not None and os.path.exists(path) and meta.get("source") == _source_fingerprint(path)
+
+def open_basket_store(path: str,
+                      store: str,
+                      sep: Optional[str]="auto",
+                      sheet: Optional[str]=None,
+                      chunksize: Optional[int]=None,
+                      rebuild: bool=False) -> Tuple[BasketMatrix, Dict[str, Any]]:
+    """
+    Baskets of `path` through the store at `store`: reused when it matches the file (unless `rebuild`),
+    otherwise the file is parsed (streamed when `chunksize` is set for CSV) and the store is (re)built.
+    Returns (baskets, meta) where meta is the _basket_meta of the build without "algorithm".
+    """
+    if rebuild or not basket_store_matches(store, path):
+        ext = os.path.splitext(path)[1].lower()
+        if chunksize and ext in [".csv", ".txt", ".tsv"]:
+            if sep == "auto":
+                sep = sniff_separator(path)
+            baskets, dr, item_col, trans_col, stats = stream_csv_baskets(path, chunksize=chunksize, sep=sep)
+        else:
+            df = read_any(path, sep=sep, sheet=sheet)
+            dr = detect_columns(df)
+            long_df, item_col, trans_col = build_transactions(df, dr)
+            baskets = build_basket_matrix(long_df, item_col, trans_col)
+            stats = None
+        meta = _basket_meta(baskets, dr, item_col, trans_col, algorithm=None)
+        del meta["algorithm"]
+        if stats:
+            meta["streaming"] = stats
+        meta["source"] = _source_fingerprint(path)
+        save_basket_store(baskets, store, meta)
+    return load_basket_store(store)
+
 def analyze_file(path: str,
                  min_support: float=0.001,
                  min_lift: float=1.0,
                  sep: Optional[str]="auto",
-                 sheet: Optional[str]=None) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+                 sheet: Optional[str]=None,
+                 algorithm: str="apriori",
+                 chunksize: Optional[int]=None,
+                 top_k: Optional[int]=None,
+                 by: str="lift",
+                 min_confidence: float=0.0,
+                 workers: int=1,
+                 store: Optional[str]=None) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+    """
+    `chunksize` switches CSV files to streaming ingestion (see stream_csv_baskets).
+    `store` mines through an on-disk basket store directory (see open_basket_store), so repeat
+    analyses of an unchanged file skip parsing.
+    """
+    if store:
+        baskets, meta = open_basket_store(path, store, sep=sep, sheet=sheet, chunksize=chunksize)
+        rules_df, fi_df = analyze_baskets(baskets, min_support=min_support, min_lift=min_lift, algorithm=algorithm,
+                                          top_k=top_k, by=by, min_confidence=min_confidence, workers=workers)
+        return rules_df, fi_df, {**meta, "algorithm": algorithm}
+    ext = os.path.splitext(path)[1].lower()
+    if chunksize and ext in [".csv", ".txt", ".tsv"]:
+        if sep == "auto":
+            sep = sniff_separator(path)
+        return analyze_csv_stream(path, min_support=min_support, min_lift=min_lift, algorithm=algorithm,
+                                  chunksize=chunksize, sep=sep, top_k=top_k, by=by, min_confidence=min_confidence,
+                                  workers=workers)
     df = read_any(path, sep=sep, sheet=sheet)
-    return analyze_dataframe(df, min_support=min_support, min_lift=min_lift)
+    return analyze_dataframe(df, min_support=min_support, min_lift=min_lift, algorithm=algorithm,
+                             top_k=top_k, by=by, min_confidence=min_confidence, workers=workers)
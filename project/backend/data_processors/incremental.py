@@ -0,0 +1,146 @@
+"""
+Incremental Apriori: keep an analysis up to date as new transactions arrive (e.g. one day of receipts)
+instead of re-mining the whole history.
+- Counts are kept for every frequent itemset and for its negative border (infrequent itemsets whose
+  subsets are all frequent); an update counts only these in the new batch.
+- Older batches are rescanned only for candidates that were never counted, which can only appear after
+  a negative-border itemset becomes frequent.
+- results() equals analyze_dataframe(<all batches concatenated>, algorithm="apriori") as long as each
+  batch brings new transactions (order ids / customer+date keys do not continue across batches).
+"""
+import pickle
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import flexible_basket as fb
+
+
+class IncrementalBasketModel:
+    def __init__(self, min_support: float = 0.001, min_lift: float = 1.0,
+                 top_k: Optional[int] = None, by: str = "lift", min_confidence: float = 0.0):
+        self.min_support = float(min_support)
+        self.min_lift = float(min_lift)
+        self.top_k = top_k
+        self.by = by
+        self.min_confidence = float(min_confidence)
+        self.names: List[str] = []  # item code -> name, codes in order of first appearance
+        self._codes: Dict[str, int] = {}
+        self.batches: List[fb.BasketMatrix] = []
+        # one bitmap counter per batch, kept between updates so rescans reuse the item bitmaps (not pickled)
+        self._counters: List[fb.BitmapSupportCounter] = []
+        self.n_transactions = 0
+        # sorted code tuple -> transaction count, for the frequent itemsets and their negative border
+        self.counts: Dict[Tuple[int, ...], int] = {}
+        self.detect: Optional[fb.DetectResult] = None
+        self.item_col: Optional[str] = None
+        self.trans_col: Optional[str] = None
+        self.last_update: Dict[str, Any] = {}
+
+    def _encode(self, long_df: pd.DataFrame) -> fb.BasketMatrix:
+        local_codes, uniques = pd.factorize(long_df[self.item_col])
+        for name in uniques.tolist():
+            if name not in self._codes:
+                self._codes[name] = len(self.names)
+                self.names.append(name)
+        mapping = np.array([self._codes[name] for name in uniques.tolist()], dtype=np.int32)
+        codes = mapping[local_codes] if len(mapping) else np.zeros(0, dtype=np.int32)
+        return fb.basket_matrix_from_codes(long_df[self.trans_col], codes, fb.ItemDictionary(names=list(self.names)))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_counters"] = []
+        return state
+
+    def _counter(self, i: int) -> fb.BitmapSupportCounter:
+        while len(self._counters) <= i:
+            self._counters.append(fb.BitmapSupportCounter(self.batches[len(self._counters)]))
+        return self._counters[i]
+
+    def _count_all(self, keys: List[Tuple[int, ...]]) -> List[int]:
+        """Counts over every batch seen so far (the rescan)."""
+        totals = np.zeros(len(keys), dtype=np.int64)
+        for i in range(len(self.batches)):
+            totals += np.asarray(self._counter(i).raw_counts(keys), dtype=np.int64)
+        return totals.tolist()
+
+    def update(self, new_df: pd.DataFrame) -> Dict[str, Any]:
+        """Add a batch of new transactions (same layout as the first batch). Returns update statistics."""
+        if self.detect is None:
+            self.detect = fb.detect_columns(new_df)
+        long_df, self.item_col, self.trans_col = fb.build_transactions(new_df, self.detect)
+        batch = self._encode(long_df)
+
+        # Tracked itemsets (and every item of the batch) are counted in the new batch only
+        self.batches.append(batch)
+        keys = sorted(set(self.counts) | {(c,) for c in np.unique(batch.indices).tolist()})
+        batch_counts = self._counter(len(self.batches) - 1).raw_counts(keys)
+        counts = {key: self.counts.get(key, 0) + c for key, c in zip(keys, batch_counts)}
+        self.n_transactions += len(batch)
+
+        # Level-wise closure as in apriori; only candidates without a count need a rescan of the history
+        n = float(self.n_transactions)
+        tracked = {key: c for key, c in counts.items() if len(key) == 1}
+        level = sorted(key for key, c in tracked.items() if c / n >= self.min_support)
+        rescanned = 0
+        k = 2
+        while level:
+            candidates = sorted(tuple(sorted(c)) for c in fb._generate_candidates([frozenset(x) for x in level], k))
+            missing = [c for c in candidates if c not in counts]
+            if missing:
+                rescanned += len(missing)
+                counts.update(zip(missing, self._count_all(missing)))
+            for c in candidates:
+                tracked[c] = counts[c]
+            level = [c for c in candidates if counts[c] / n >= self.min_support]
+            k += 1
+        self.counts = tracked
+
+        self.last_update = {
+            "new_transactions": len(batch),
+            "tracked_itemsets": len(tracked),
+            "rescanned_itemsets": rescanned,
+        }
+        return self.last_update
+
+    def frequents(self) -> Tuple[Dict[int, Dict[frozenset, float]], fb.ItemDictionary]:
+        """
+        Frequent itemsets in the layout apriori() returns for the full history: item codes re-assigned in
+        sorted name order (as encode_items does) and each level in sorted code order.
+        """
+        order = sorted(range(len(self.names)), key=self.names.__getitem__)
+        rank = np.empty(len(self.names), dtype=np.int64)
+        rank[order] = np.arange(len(self.names))
+        n = float(self.n_transactions)
+        levels: Dict[int, list] = {1: []}
+        for key, c in self.counts.items():
+            if n and c / n >= self.min_support:
+                levels.setdefault(len(key), []).append((tuple(sorted(rank[list(key)].tolist())), c / n))
+        freqs = {k: {frozenset(t): sup for t, sup in sorted(levels[k])} for k in sorted(levels) if levels[k] or k == 1}
+        return freqs, fb.ItemDictionary(names=[self.names[i] for i in order])
+
+    def results(self) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+        """(rules_df, frequent_itemsets_df, meta) over all batches, like fb.analyze_dataframe."""
+        if not self.batches:
+            raise ValueError("No transactions yet; call update() first")
+        freqs, items = self.frequents()
+        rules_df, fi_df = fb.frequents_to_frames(freqs, items, min_lift=self.min_lift, top_k=self.top_k,
+                                                 by=self.by, min_confidence=self.min_confidence)
+        meta = fb._basket_meta(self.batches[-1], self.detect, self.item_col, self.trans_col, "apriori")
+        meta["n_transactions"] = self.n_transactions
+        meta["n_unique_items"] = len(self.names)
+        meta["incremental"] = {"batches": len(self.batches), **self.last_update}
+        return rules_df, fi_df, meta
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> "IncrementalBasketModel":
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+        if not isinstance(model, cls):
+            raise ValueError(f"{path} does not hold an IncrementalBasketModel")
+        return model
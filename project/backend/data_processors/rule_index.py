@@ -0,0 +1,166 @@
+"""
+Server-side rule index: keeps a mined rule set in NumPy arrays so it can be paged, sorted
+and filtered without shipping every rule to the client.
+- Item lists are stored CSR-style as int32 codes (antecedents and consequents separately)
+- support/confidence/lift are float64 columns with precomputed sort orders
+- An item -> rule inverted index answers `contains=item` filters
+- The frequent itemsets table of the same analysis rides along (`itemsets`) so it can be paged too
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+RULE_COLUMNS = ["Antecedents", "Consequents", "Support", "Confidence", "Lift"]
+SORT_COLUMNS = ("lift", "confidence", "support")
+DEFAULT_SORT = "-lift"
+
+
+def json_floats(values, ndigits: int = 6) -> list:
+    """
+    [round(float(v), ndigits) for v in values] with NaN/inf -> None (valid JSON), computed in NumPy.
+    rint(v * 10**ndigits) / 10**ndigits only differs from Python's correctly rounded round()
+    when the scaled value sits on a .5 tie, so those few entries are redone with round().
+    """
+    v = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    with np.errstate(invalid="ignore", over="ignore"):
+        scaled = v * scale
+        out = np.rint(scaled) / scale
+        magnitude = np.abs(scaled)
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-9 * np.maximum(1.0, magnitude)
+        redo = np.flatnonzero(near_tie | (magnitude >= 2.0 ** 52))
+    finite = np.isfinite(v)
+    result = out.tolist()
+    for i in redo.tolist():
+        if finite[i]:
+            result[i] = round(float(v[i]), ndigits)
+    if not finite.all():
+        for i in np.flatnonzero(~finite).tolist():
+            result[i] = None
+    return result
+
+
+def _csr(item_lists: List[Tuple[str, ...]], codes: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    lengths = np.fromiter((len(x) for x in item_lists), dtype=np.int64, count=len(item_lists))
+    indptr = np.zeros(len(item_lists) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    flat = np.fromiter((codes[name] for items in item_lists for name in items), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, flat
+
+
+class RuleIndex:
+    def __init__(self, item_names: List[str],
+                 ant_indptr: np.ndarray, ant_codes: np.ndarray,
+                 con_indptr: np.ndarray, con_codes: np.ndarray,
+                 support: np.ndarray, confidence: np.ndarray, lift: np.ndarray):
+        self.item_names = item_names
+        self.ant_indptr = ant_indptr
+        self.ant_codes = ant_codes
+        self.con_indptr = con_indptr
+        self.con_codes = con_codes
+        self.columns = {"support": support, "confidence": confidence, "lift": lift}
+        self._codes = {name: code for code, name in enumerate(item_names)}
+        self.itemsets: List[dict] = []  # frequentItemsetsTable rows, in mining order
+
+        n = len(support)
+        # Presorted orders; stable so ties keep the mining order (lift, confidence, support desc)
+        self.orders = {}
+        for col in SORT_COLUMNS:
+            values = self.columns[col]
+            self.orders[col] = np.argsort(values, kind="stable").astype(np.int32)
+            self.orders["-" + col] = np.argsort(-values, kind="stable").astype(np.int32)
+
+        # Inverted index: rules containing each item (either side), ascending rule ids
+        rule_ids = np.concatenate([
+            np.repeat(np.arange(n, dtype=np.int64), np.diff(ant_indptr)),
+            np.repeat(np.arange(n, dtype=np.int64), np.diff(con_indptr)),
+        ])
+        item_codes = np.concatenate([ant_codes, con_codes]).astype(np.int64)
+        keys = np.sort(item_codes * max(n, 1) + rule_ids)
+        self.item_rules = (keys % max(n, 1)).astype(np.int32)
+        self.item_indptr = np.zeros(len(item_names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(item_codes, minlength=len(item_names)), out=self.item_indptr[1:])
+
+    @classmethod
+    def from_rules(cls, rules_df: pd.DataFrame) -> "RuleIndex":
+        """Build from the rules DataFrame of fb.analyze_dataframe, keeping its row order."""
+        if rules_df is None or rules_df.empty:
+            empty_ptr = np.zeros(1, dtype=np.int64)
+            empty = np.zeros(0, dtype=np.float64)
+            return cls([], empty_ptr, np.zeros(0, dtype=np.int32), empty_ptr, np.zeros(0, dtype=np.int32),
+                       empty, empty, empty)
+        antecedents = [tuple(x) for x in rules_df["antecedents"]]
+        consequents = [tuple(x) for x in rules_df["consequents"]]
+        names = sorted({name for items in antecedents for name in items} |
+                       {name for items in consequents for name in items})
+        codes = {name: code for code, name in enumerate(names)}
+        ant_indptr, ant_codes = _csr(antecedents, codes)
+        con_indptr, con_codes = _csr(consequents, codes)
+        return cls(names, ant_indptr, ant_codes, con_indptr, con_codes,
+                   rules_df["support"].to_numpy(dtype=np.float64),
+                   rules_df["confidence"].to_numpy(dtype=np.float64),
+                   rules_df["lift"].to_numpy(dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.columns["support"])
+
+    def _join(self, indptr: np.ndarray, codes: np.ndarray, rule: int) -> str:
+        names = self.item_names
+        return ", ".join(names[c] for c in codes[indptr[rule]:indptr[rule + 1]].tolist())
+
+    def rows(self, positions: Iterable[int]) -> List[dict]:
+        """rulesTable-style dicts for the given rule ids."""
+        positions = np.fromiter(positions, dtype=np.int64)
+        columns = (
+            [self._join(self.ant_indptr, self.ant_codes, p) for p in positions.tolist()],
+            [self._join(self.con_indptr, self.con_codes, p) for p in positions.tolist()],
+            json_floats(self.columns["support"][positions]),
+            json_floats(self.columns["confidence"][positions]),
+            json_floats(self.columns["lift"][positions]),
+        )
+        return [dict(zip(RULE_COLUMNS, values)) for values in zip(*columns)]
+
+    def to_frame(self) -> pd.DataFrame:
+        """All rules in mining order, as the export table (same columns/values as rulesTable)."""
+        n = len(self)
+        return pd.DataFrame({
+            "Antecedents": [self._join(self.ant_indptr, self.ant_codes, p) for p in range(n)],
+            "Consequents": [self._join(self.con_indptr, self.con_codes, p) for p in range(n)],
+            "Support": json_floats(self.columns["support"]),
+            "Confidence": json_floats(self.columns["confidence"]),
+            "Lift": json_floats(self.columns["lift"]),
+        }, columns=RULE_COLUMNS)
+
+    def rules_with(self, item: str) -> np.ndarray:
+        """Ids of the rules mentioning `item` on either side (empty for unknown items)."""
+        code = self._codes.get(item)
+        if code is None:
+            return np.zeros(0, dtype=np.int32)
+        return self.item_rules[self.item_indptr[code]:self.item_indptr[code + 1]]
+
+    def query(self, offset: int = 0, limit: int = 50, sort: str = DEFAULT_SORT,
+              min_lift: Optional[float] = None, contains: Iterable[str] = ()) -> Tuple[int, List[dict]]:
+        """
+        One page of rules. `sort` is a column name (ascending) or "-column" (descending);
+        `contains` keeps rules mentioning every given item. Returns (total matches, rows).
+        """
+        if sort not in self.orders:
+            raise ValueError(f"Unknown sort: {sort!r} (expected one of {sorted(self.orders)})")
+        order = self.orders[sort]
+        mask = None
+        if min_lift is not None:
+            mask = self.columns["lift"] >= min_lift
+        for item in contains:
+            hit = np.zeros(len(self), dtype=bool)
+            hit[self.rules_with(item)] = True
+            mask = hit if mask is None else mask & hit
+        if mask is not None:
+            order = order[mask[order]]
+        offset = max(0, int(offset))
+        return len(order), self.rows(order[offset:offset + max(0, int(limit))].tolist())
+
+    def itemsets_page(self, offset: int = 0, limit: int = 50) -> Tuple[int, List[dict]]:
+        """One page of the frequent itemsets table. Returns (total itemsets, rows)."""
+        offset = max(0, int(offset))
+        return len(self.itemsets), self.itemsets[offset:offset + max(0, int(limit))]
@@ -0,0 +1,170 @@
+"""
+Lightweight stage tracing: where did the time of an analysis go?
+- `with trace() as t:` collects the spans recorded by this thread until the block ends (t.spans);
+  a nested trace() joins the one already open.
+- `with span("build_transactions", rows_in=len(df)) as s: ... s.set(rows_out=...)` records one stage:
+  start/duration in ms, the enclosing span, peak RSS so far and any attributes.
+- Outside an open trace, or with set_enabled(False), span() returns a shared no-op object, so the
+  instrumented code pays one thread-local lookup per stage.
+- histogram_counts()/prometheus_histograms() turn spans into additive bucket counters (they can be summed
+  across processes, e.g. through jobs.report_counter) and render them in the Prometheus text format.
+"""
+import math
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, math.inf)
+HISTOGRAM_COUNTER = "stage_seconds"
+
+_enabled = True
+_local = threading.local()
+
+
+def set_enabled(enabled: bool) -> None:
+    """Turn span recording on or off for the whole process (open traces then stay empty)."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far (None where the resource module is missing)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+class Trace:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.spans: List[Dict[str, Any]] = []
+        self._stack: List[Dict[str, Any]] = []
+        self._start = time.perf_counter()
+
+
+class _Span:
+    __slots__ = ("trace", "record", "start")
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict[str, Any]):
+        self.trace = trace
+        self.record = {"name": name, "parent": trace._stack[-1]["name"] if trace._stack else None, **attrs}
+
+    def set(self, **attrs) -> None:
+        self.record.update(attrs)
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        self.record["start_ms"] = round((self.start - self.trace._start) * 1000, 3)
+        self.trace.spans.append(self.record)
+        self.trace._stack.append(self.record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.trace._stack.pop()
+        self.record["duration_ms"] = round((time.perf_counter() - self.start) * 1000, 3)
+        self.record["peak_rss_bytes"] = peak_rss_bytes()
+        if exc_type is not None:
+            self.record["error"] = exc_type.__name__
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """Context manager recording one stage into the open trace (a no-op without one)."""
+    current = getattr(_local, "trace", None)
+    if current is None:
+        return _NOOP_SPAN
+    return _Span(current, name, attrs)
+
+
+class trace:
+    """Collect the spans of this thread; joins the enclosing trace when one is already open."""
+
+    def __init__(self):
+        self._owner = False
+        self._trace: Optional[Trace] = None
+
+    def __enter__(self) -> Trace:
+        current = getattr(_local, "trace", None)
+        if current is not None:
+            self._trace = current
+        elif _enabled:
+            self._owner = True
+            self._trace = _local.trace = Trace()
+        else:
+            self._trace = Trace(enabled=False)
+        return self._trace
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._owner:
+            _local.trace = None
+
+
+def histogram_counts(spans: Iterable[Dict[str, Any]]) -> Dict[Tuple, float]:
+    """
+    Additive counters of the stage duration histogram: one ("stage_seconds", "bucket", name, le) hit in the
+    first bucket holding each span, plus "sum" and "count" per stage. Sums of these dicts merge histograms.
+    """
+    counts: Dict[Tuple, float] = {}
+    for record in spans:
+        if record.get("duration_ms") is None:
+            continue
+        name = record["name"]
+        seconds = record["duration_ms"] / 1000.0
+        le = next(b for b in HISTOGRAM_BUCKETS if seconds <= b)
+        for key, amount in (((HISTOGRAM_COUNTER, "bucket", name, le), 1),
+                            ((HISTOGRAM_COUNTER, "sum", name), seconds),
+                            ((HISTOGRAM_COUNTER, "count", name), 1)):
+            counts[key] = counts.get(key, 0) + amount
+    return counts
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else repr(bound)
+
+
+def prometheus_histograms(counters: Dict[Any, float], metric: str) -> List[str]:
+    """Prometheus text lines of the histogram held in `counters` (see histogram_counts), cumulative buckets."""
+    stages = sorted({key[2] for key in counters
+                     if isinstance(key, tuple) and key[:2] == (HISTOGRAM_COUNTER, "count")})
+    lines = [f"# HELP {metric} Duration of analysis stages in seconds.", f"# TYPE {metric} histogram"]
+    for stage in stages:
+        label = _label(stage)
+        cumulative = 0
+        for bound in HISTOGRAM_BUCKETS:
+            cumulative += counters.get((HISTOGRAM_COUNTER, "bucket", stage, bound), 0)
+            lines.append(f'{metric}_bucket{{stage="{label}",le="{_le(bound)}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{stage="{label}"}} {counters.get((HISTOGRAM_COUNTER, "sum", stage), 0.0)!r}')
+        lines.append(f'{metric}_count{{stage="{label}"}} {counters.get((HISTOGRAM_COUNTER, "count", stage), 0)}')
+    return lines
@@ -0,0 +1,122 @@
+"""
+Command line entry point for flexible_basket: build and inspect on-disk basket stores, and mine files.
+
+    cd project/backend
+    python flexibasket_cli.py build sales_2024.csv sales_2024.basket --chunksize 200000
+    python flexibasket_cli.py info sales_2024.basket
+    python flexibasket_cli.py analyze sales_2024.csv --store sales_2024.basket --min_support 0.001 --output rules.csv
+
+A basket store is a directory of memory-mapped arrays (indptr.npy, indices.npy, and the item-major
+tid_indptr.npy, tids.npy) plus items.json and meta.json; `analyze --store` reuses it while the source file
+is unchanged, so repeat analyses skip parsing.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from data_processors import flexible_basket as fb
+
+
+def build(args):
+    start = time.perf_counter()
+    if fb.basket_store_matches(args.store, args.input) and not args.force:
+        print(f"[OK] {args.store} is up to date with {args.input}")
+        return
+    baskets, meta = fb.open_basket_store(args.input, args.store, sep=args.sep, sheet=args.sheet,
+                                         chunksize=args.chunksize, rebuild=True)
+    print(f"[OK] Built {args.store} in {time.perf_counter() - start:.2f}s:"
+          f" {len(baskets):,} transactions, {baskets.n_items:,} items")
+
+
+def info(args):
+    baskets, meta = fb.load_basket_store(args.store)
+    lengths = np.diff(baskets.indptr)
+    counts = baskets.item_counts()
+    files = {name: os.path.getsize(os.path.join(args.store, name)) for name in sorted(os.listdir(args.store))}
+    print(json.dumps(meta, ensure_ascii=False, indent=2))
+    print(f"transactions: {len(baskets):,}")
+    print(f"items:        {baskets.n_items:,}")
+    print(f"item entries: {len(baskets.indices):,}")
+    if len(baskets):
+        print(f"basket size:  mean {lengths.mean():.2f}, max {int(lengths.max())}")
+    print("files:        " + ", ".join(f"{name} {size / 2**20:.1f}MiB" for name, size in files.items()))
+    if len(counts):
+        print(f"top {args.top} items:")
+        for code in np.argsort(-counts, kind="stable")[:args.top].tolist():
+            print(f"  {counts[code]:>10,}  {baskets.items.names[code]}")
+
+
+def analyze(args):
+    start = time.perf_counter()
+    rules_df, fi_df, meta = fb.analyze_file(
+        args.input,
+        min_support=args.min_support,
+        min_lift=args.min_lift,
+        sep=args.sep,
+        sheet=args.sheet,
+        algorithm=args.algorithm,
+        chunksize=args.chunksize,
+        top_k=args.top_k,
+        min_confidence=args.min_confidence,
+        workers=args.workers,
+        store=args.store,
+    )
+    print(f"[OK] {len(rules_df):,} rules, {len(fi_df):,} frequent itemsets from {meta['n_transactions']:,}"
+          f" transactions in {time.perf_counter() - start:.2f}s")
+    if args.output:
+        rules_df.to_csv(args.output, index=False, encoding="utf-8-sig")
+        print(f"[OK] Rules written to {args.output}")
+    else:
+        print(rules_df.head(args.top).to_string(index=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_read_options(p):
+        p.add_argument("--sep", default="auto")
+        p.add_argument("--sheet", default=None)
+        p.add_argument("--chunksize", type=int, default=None, help="stream CSV input this many rows at a time")
+
+    p = commands.add_parser("build", help="build or refresh a basket store from a CSV/Excel file")
+    p.add_argument("input")
+    p.add_argument("store")
+    p.add_argument("--force", action="store_true", help="rebuild even if the store is up to date")
+    add_read_options(p)
+    p.set_defaults(func=build)
+
+    p = commands.add_parser("info", help="summarize a basket store")
+    p.add_argument("store")
+    p.add_argument("--top", type=int, default=10)
+    p.set_defaults(func=info)
+
+    p = commands.add_parser("analyze", help="mine association rules from a file (optionally through a store)")
+    p.add_argument("input")
+    p.add_argument("--store", default=None)
+    p.add_argument("--min_support", type=float, default=0.001)
+    p.add_argument("--min_lift", type=float, default=1.0)
+    p.add_argument("--min_confidence", type=float, default=0.0)
+    p.add_argument("--algorithm", choices=sorted(fb.MINERS), default="apriori")
+    p.add_argument("--top_k", type=int, default=None)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--output", default=None, help="write all rules to this CSV instead of printing the top ones")
+    p.add_argument("--top", type=int, default=20)
+    add_read_options(p)
+    p.set_defaults(func=analyze)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
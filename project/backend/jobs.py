@@ -0,0 +1,231 @@
+"""
+Background jobs for long-running analysis requests.
+- Jobs run on a bounded worker pool (processes by default, threads with backend='thread'),
+  so CPU-heavy mining never blocks request handling. No external broker is needed.
+- Job functions report progress with report_progress() and bump named counters with
+  report_counter(); job state and counters are kept in memory in the process that owns the JobManager.
+"""
+import os
+import queue
+import threading
+import multiprocessing
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class JobQueueFull(Exception):
+    """Raised by JobManager.submit when too many jobs are already pending."""
+
+
+# Worker-side state: the progress channel is installed by the pool initializer,
+# the current job id is set around each job call.
+_progress_queue = None
+_worker_state = threading.local()
+
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def report_progress(progress, stage=None):
+    """Publish progress (0-100) and an optional stage label for the job running in this worker."""
+    job_id = getattr(_worker_state, 'job_id', None)
+    if _progress_queue is None or job_id is None:
+        return
+    _progress_queue.put((job_id, float(progress), stage))
+
+
+def report_counter(name, amount=1):
+    """Add amount to the JobManager counter `name` (see JobManager.counters) from inside a job."""
+    if _progress_queue is None or getattr(_worker_state, 'job_id', None) is None:
+        return
+    # counter updates share the progress channel; a None job id marks them
+    _progress_queue.put((None, name, amount))
+
+
+def _run_job(job_id, fn, args, kwargs):
+    _worker_state.job_id = job_id
+    try:
+        report_progress(0, 'started')
+        return fn(*args, **kwargs)
+    finally:
+        _worker_state.job_id = None
+
+
+class JobManager:
+    def __init__(self, max_workers=None, backend='process', max_pending=32, max_finished=200):
+        if backend not in ('process', 'thread'):
+            raise ValueError(f"Unknown job backend: {backend!r} (expected 'process' or 'thread')")
+        self.max_workers = max_workers or min(2, os.cpu_count() or 1)
+        self.backend = backend
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._counters = {}
+        self._futures = {}
+        self._lock = threading.RLock()
+        self._executor = None
+        self._progress = None
+
+    def _ensure_started(self):
+        # Started lazily so a pre-forking server (gunicorn) creates the pool inside each worker
+        if self._executor is not None:
+            return
+        if self.backend == 'process':
+            ctx = multiprocessing.get_context()
+            self._progress = ctx.Queue()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx,
+                                                 initializer=_init_worker, initargs=(self._progress,))
+        else:
+            self._progress = queue.Queue()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job',
+                                                initializer=_init_worker, initargs=(self._progress,))
+        threading.Thread(target=self._drain_progress, args=(self._progress,), daemon=True).start()
+
+    def _drain_progress(self, progress_queue):
+        while True:
+            try:
+                message = progress_queue.get()
+            except (EOFError, OSError):
+                return
+            if message is None:
+                # the pool feeding this queue was shut down (see _discard_pool)
+                if hasattr(progress_queue, 'close'):
+                    progress_queue.close()
+                return
+            job_id, progress, stage = message
+            if job_id is None:
+                # report_counter message: (None, counter name, amount)
+                self.add_counters({progress: stage})
+                continue
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job['status'] in FINISHED_STATUSES:
+                    continue
+                if job['status'] == QUEUED:
+                    job['status'] = RUNNING
+                    job['startedAt'] = datetime.now().isoformat()
+                job['progress'] = max(job['progress'], progress)
+                if stage:
+                    job['stage'] = stage
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return the new job id. fn must be a picklable top-level function."""
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job['status'] not in FINISHED_STATUSES)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f'Too many pending jobs ({pending}); try again later')
+            self._ensure_started()
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'jobId': job_id,
+                'status': QUEUED,
+                'progress': 0.0,
+                'stage': 'queued',
+                'createdAt': datetime.now().isoformat(),
+                'startedAt': None,
+                'finishedAt': None,
+                'error': None,
+                'result': None,
+            }
+            self._evict_finished()
+            owner = self._executor
+            future = owner.submit(_run_job, job_id, fn, args, kwargs)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._on_done(job_id, f, owner))
+        return job_id
+
+    def _discard_pool(self, owner):
+        """Shut down a broken pool and stop draining its progress queue (no-op once it was replaced)."""
+        if self._executor is not owner:
+            return
+        self._executor = None
+        owner.shutdown(wait=False, cancel_futures=True)
+        progress, self._progress = self._progress, None
+        progress.put(None)
+
+    def _on_done(self, job_id, future, owner):
+        with self._lock:
+            self._futures.pop(job_id, None)
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if job['status'] != CANCELLED:
+                if future.cancelled():
+                    job['status'] = CANCELLED
+                elif future.exception() is not None:
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool):
+                        # a worker died (e.g. OOM); start a fresh pool on the next submit. Every future of
+                        # the broken pool fails, so only the first callback for that pool discards it
+                        self._discard_pool(owner)
+                    job['status'] = FAILED
+                    job['error'] = str(error) or error.__class__.__name__
+                else:
+                    job['status'] = SUCCEEDED
+                    job['progress'] = 100.0
+                    job['stage'] = 'completed'
+                    job['result'] = future.result()
+            job['finishedAt'] = job['finishedAt'] or datetime.now().isoformat()
+
+    def get(self, job_id):
+        """Snapshot of the job (None if unknown)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def cancel(self, job_id):
+        """
+        Cancel a job and return its snapshot (None if unknown).
+        Queued jobs never start; a running job cannot be interrupted, so it holds its worker until it
+        finishes and its result is discarded (the snapshot carries a `note` saying so).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] not in FINISHED_STATUSES:
+                future = self._futures.get(job_id)
+                if future is not None:
+                    future.cancel()
+                if job['status'] == RUNNING:
+                    job['note'] = ('The job was already running: it keeps its worker slot until it finishes, '
+                                   'then its result is discarded.')
+                job['status'] = CANCELLED
+                job['stage'] = 'cancelled'
+                job['finishedAt'] = datetime.now().isoformat()
+            return dict(job)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return {'backend': self.backend, 'workers': self.max_workers, 'jobs': counts}
+
+    def add_counters(self, amounts):
+        """Add {counter name: amount} to the counters, for work done outside jobs (in this process)."""
+        with self._lock:
+            for name, amount in amounts.items():
+                self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counters(self):
+        """Totals reported by jobs through report_counter() and by add_counters()."""
+        with self._lock:
+            return dict(self._counters)
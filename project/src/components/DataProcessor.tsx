@@ -66,10 +66,24 @@ const DataProcessor: React.FC<DataProcessorProps> = ({
           throw new Error(errorData.error || 'Processing failed');
         }
 
-        setCurrentStep(5);
-        await new Promise(resolve => setTimeout(resolve, 1000));
-
-        const result = await response.json();
+        // The backend queues the analysis as a job; poll until it finishes
+        const { jobId } = await response.json();
+        let result: any = null;
+        while (!result) {
+          await new Promise(resolve => setTimeout(resolve, 1000));
+          const jobResponse = await fetch(api(`/api/jobs/${jobId}`));
+          const job = await jobResponse.json();
+          if (!jobResponse.ok) {
+            throw new Error(job.error || 'Processing failed');
+          }
+          if (job.status === 'succeeded') {
+            result = job.result;
+          } else if (job.status === 'failed' || job.status === 'cancelled') {
+            throw new Error(job.error || `Processing ${job.status}`);
+          } else if (job.stage === 'saving results') {
+            setCurrentStep(5);
+          }
+        }
         
         setCurrentStep(6);
         await new Promise(resolve => setTimeout(resolve, 500));